@@ -1,12 +1,23 @@
 """The __init__ of package."""
 
-from .gui import ChessAIApp
-from .engine import Engine
-from . import vision
+from .engine import Engine, EnginePool
+from .board import Board
+
+def __getattr__(name: str):
+    """Import the GUI (tkinter) and vision only when used, servers may have neither."""
+    if name == 'ChessAIApp':
+        from .gui import ChessAIApp
+        return ChessAIApp
+    if name == 'vision':
+        from . import vision
+        return vision
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 __all__ = [
     "ChessAIApp",
     "Engine",
+    "EnginePool",
+    "Board",
     "vision",
 ]
 
@@ -0,0 +1,151 @@
+"""The batch analysis of ChessAI, analyses positions from files without the GUI."""
+
+import json
+import pathlib
+import sys
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from .board import is_fen_valid
+from .engine import EnginePool
+from .pgn import read_pgn
+
+def read_epd(file):
+    """
+    Yield the positions of an EPD file (eg: `<4 FEN fields> bm Nf3; id "WAC.001";`).
+
+    Args:
+        file (TextIO): the opened EPD file.
+
+    Yields:
+        tuple[str, dict]: the FEN and the operations (opcode: operands as a string).
+    """
+    for line in file:
+        fields: list[str] = line.split(maxsplit=4)
+        if len(fields) < 4:
+            continue
+
+        operations: dict = {}
+        if len(fields) == 5:
+            for operation in fields[4].split(';'):
+                opcode, _, operand = operation.strip().partition(' ')
+                if opcode:
+                    operations[opcode] = operand.strip().strip('"')
+
+        fen: str = ' '.join(fields[:4])
+        fen += f" {operations.get('hmvc', 0)} {operations.get('fmvn', 1)}"
+        yield fen, operations
+
+def read_positions(path: str, file_format: str = 'auto'):
+    """
+    Yield the positions of a PGN, EPD or FEN-per-line file, one at a time.
+
+    Args:
+        path (str): the file, `-` for stdin.
+        file_format (str, optional): `pgn`, `epd`, `fen` or `auto` (by the file's suffix). \
+Defaults to 'auto'.
+
+    Yields:
+        tuple[str, dict]: the FEN and what is known about it (eg: game, ply, played move, id).
+    """
+    if file_format == 'auto':
+        file_format = pathlib.Path(path).suffix.lower().lstrip('.')
+        if file_format not in ('pgn', 'epd'):
+            file_format = 'fen'
+
+    if file_format == 'pgn':
+        # games with an illegal move are cut short instead of stopping the whole file
+        game: int = -1
+        for headers, ply, fen, move in read_pgn(sys.stdin.buffer if path == '-' else path,
+                                                strict=False):
+            if ply == 0:
+                game += 1
+            yield fen, {'game': game, 'ply': ply, 'played': move,
+                        'white': headers.get('White'), 'black': headers.get('Black')}
+        return
+
+    file = sys.stdin if path == '-' else open(path, mode='r', encoding='utf-8', errors='replace')
+    try:
+        if file_format == 'epd':
+            for index, (fen, operations) in enumerate(read_epd(file)):
+                yield fen, {'id': operations.get('id', str(index))}
+        else:
+            for index, line in enumerate(file):
+                if line.strip():
+                    yield line.strip(), {'id': str(index)}
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+def analyse_file(data: dict, path: str, output=None, file_format: str = 'auto',
+                 workers: int | None = None, threads: int | None = None, multipv: int = 1,
+                 depth: int | None = None, movetime: int | None = None,
+                 nodes: int | None = None, affinity: str = 'shared') -> int:
+    """
+    Analyse every position of a file on an `EnginePool`, writing one JSON line per position \
+as soon as it is done (not in the input's order). Only a few positions per worker are read \
+ahead, so memory does not grow with the file.
+
+    Args:
+        data (dict): the setting data (same as `Engine`).
+        path (str): the PGN, EPD or FEN-per-line file, `-` for stdin.
+        output (TextIO | None, optional): where to write. Defaults to stdout.
+        file_format (str, optional): see `read_positions()`. Defaults to 'auto'.
+        workers (int | None, optional): number of Stockfish processes. Defaults to the pool's.
+        threads (int | None, optional): the `Threads` budget of the pool. Defaults to the pool's.
+        multipv (int, optional): how many best moves. Defaults to 1.
+        depth (int | None, optional): plies per position. Defaults to None.
+        movetime (int | None, optional): milliseconds per position. Defaults to None.
+        nodes (int | None, optional): nodes per position. Defaults to None.
+        affinity (str, optional): `shared` or `dedicated` CPUs per worker (see \
+`assign_cores()`). Defaults to 'shared'.
+
+    Returns:
+        int: the number of positions analysed.
+    """
+    output = output or sys.stdout
+    done: int = 0
+
+    def write(fen: str, info: dict, analysis: dict) -> None:
+        record: dict = dict(info, fen=fen)
+        if analysis:
+            record.update({
+                'eval': {'type': analysis['type'], 'value': analysis['value']},
+                'best_moves': [move['Move'] for move in analysis['moves']],
+                'pv': analysis['moves'][0]['PV'],
+                'depth': analysis['depth'],
+                'seldepth': analysis['seldepth'],
+                'nodes': analysis['nodes'],
+                'nps': analysis['nps'],
+                'time': analysis['time'],
+                'book': analysis.get('book', False),
+            })
+        output.write(json.dumps(record) + '\n')
+        output.flush()
+
+    with EnginePool(data, workers, threads, affinity) as pool:
+        limit: int = pool.size * 2 # positions read ahead
+        running: dict = {} # future: (fen, info)
+
+        def finish(futures) -> None:
+            nonlocal done
+            for future in futures:
+                fen, info = running.pop(future)
+                try:
+                    analysis: dict = future.result()
+                except Exception as err: # the worker crashed, the pool restarts it
+                    analysis, info = {}, dict(info, error=str(err))
+                write(fen, info, analysis)
+                done += 1
+
+        for fen, info in read_positions(path, file_format):
+            # Stockfish may crash on an invalid position, so do not send it
+            if not is_fen_valid(fen, data['Stockfish']['UCI_Chess960']):
+                write(fen, dict(info, error='Invalid FEN'), {})
+                continue
+
+            running[pool.analyse(fen, multipv, depth, movetime, nodes)] = (fen, info)
+            if len(running) >= limit:
+                finish(wait(running, return_when=FIRST_COMPLETED).done)
+        finish(wait(running).done)
+
+    return done
@@ -0,0 +1,377 @@
+"""The EPD benchmark of ChessAI, to see how the settings change solving speed."""
+
+import json
+import os
+import platform
+import time
+
+from .batch import read_epd
+from .board import Board
+from .engine import Engine, UCIEngine, go_command
+
+# middlegame and endgame positions of Stockfish's own `bench`, searched by `tune()`
+TUNE_POSITIONS: tuple[str] = (
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 10',
+    '4rrk1/pp1n3p/3q2pQ/2p1pb2/2PP4/2P3N1/P2B2PP/4RRK1 b - - 7 19',
+    'rq3rk1/ppp2ppp/1bnpb3/3N2B1/3NP3/7P/PPPQ1PP1/2KR3R w - - 7 14',
+    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 11',
+)
+# ms, a search shorter than that says little about Threads and Hash
+TUNE_MIN_MOVETIME: int = 200
+
+def load_suite(path: str, chess960: bool = False) -> list[dict]:
+    """
+    Read an EPD test suite.
+
+    Args:
+        path (str): the EPD file, positions with neither `bm` nor `am` are skipped.
+        chess960 (bool, optional): the moves are Chess960 ones. Defaults to False.
+
+    Raises:
+        ValueError: a `bm` or `am` move is not legal.
+
+    Returns:
+        list[dict]: `id`, `fen`, `bm` and `am` (moves as `{current}{moved}`, eg: g1f3).
+    """
+    suite: list[dict] = []
+    with open(path, mode='r', encoding='utf-8') as read_file:
+        for index, (fen, operations) in enumerate(read_epd(read_file)):
+            if 'bm' not in operations and 'am' not in operations:
+                continue
+            board = Board(fen, chess960=chess960)
+            suite.append({
+                'id': operations.get('id', str(index)),
+                'fen': fen,
+                'bm': [board.parse_san(san) for san in operations.get('bm', '').split()],
+                'am': [board.parse_san(san) for san in operations.get('am', '').split()],
+            })
+        read_file.close()
+    return suite
+
+def run_suite(engine: Engine, suite: list[dict], depth: int | None = None,
+              movetime: int | None = None, nodes: int | None = None, on_result=None) -> dict:
+    """
+    Search every position of a suite once, from an empty hash.
+
+    A position is solved if the final best move is a `bm` (and not an `am`). Its time to \
+solution is Stockfish's time when the best move last became (and stayed) right.
+
+    Args:
+        engine (Engine): the engine, with the settings to measure.
+        suite (list[dict]): see `load_suite()`.
+        depth (int | None, optional): plies per position. Defaults to None.
+        movetime (int | None, optional): milliseconds per position. Defaults to None.
+        nodes (int | None, optional): nodes per position. Defaults to None.
+        on_result (Callable | None, optional): called with each position's result. \
+Defaults to None.
+
+    Returns:
+        dict: the `limit`, the engine `settings`, `solved`, `total`, `nodes`, `nps`, \
+`time` (seconds) and `positions` (id, solved, best move, time to solution in ms, depth, \
+seldepth, nodes, nps).
+    """
+    positions: list[dict] = []
+    total_nodes: int = 0
+    total_time: int = 0 # ms, as Stockfish says
+    start: float = time.monotonic()
+
+    for item in suite:
+        def right(move: str) -> bool:
+            return (not item['bm'] or move in item['bm']) and move not in item['am']
+
+        # ucinewgame, so every position starts from an empty hash
+        engine.set_fen(item['fen'], new_game=True)
+        lines: list[dict] = [info for info in engine.search(depth, movetime, nodes)
+                             if info['multipv'] == 1 and info['pv']]
+
+        since: int | None = None # ms, when the best move became right
+        for info in lines:
+            if not right(info['pv'][0]):
+                since = None
+            elif since is None:
+                since = info.get('time', 0)
+
+        last: dict = lines[-1] if lines else {}
+        result: dict = {
+            'id': item['id'],
+            'solved': since is not None,
+            'move': last['pv'][0] if last else None,
+            'time_to_solution': since,
+            'depth': last.get('depth', 0),
+            'seldepth': last.get('seldepth', 0),
+            'nodes': last.get('nodes', 0),
+            'nps': last.get('nps', 0),
+        }
+        positions.append(result)
+        total_nodes += result['nodes']
+        total_time += last.get('time', 0)
+        if on_result is not None:
+            on_result(result)
+
+    return {
+        'limit': {'depth': depth, 'movetime': movetime, 'nodes': nodes},
+        'settings': engine.engine.get_parameters(),
+        'solved': sum(result['solved'] for result in positions),
+        'total': len(positions),
+        'nodes': total_nodes,
+        'nps': int(total_nodes * 1000 / total_time) if total_time else 0,
+        'time': time.monotonic() - start,
+        'positions': positions,
+    }
+
+def compare(result: dict, baseline: dict, slower: float = 1.5) -> list[str]:
+    """
+    Find regressions against an earlier run.
+
+    Args:
+        result (dict): this run (see `run_suite()`).
+        baseline (dict): the earlier run, loaded from its JSON file.
+        slower (float, optional): a solution this many times slower (and 10 ms or more) \
+counts as a regression. Defaults to 1.5.
+
+    Returns:
+        list[str]: the regressions, empty if none.
+    """
+    regressions: list[str] = []
+    if result['limit'] != baseline['limit']:
+        regressions.append(f"Different limits: {result['limit']} (was {baseline['limit']})")
+
+    before: dict = {position['id']: position for position in baseline['positions']}
+    for position in result['positions']:
+        old = before.get(position['id'])
+        if old is None or not old['solved']:
+            continue
+        if not position['solved']:
+            regressions.append(f"{position['id']}: not solved anymore \
+(played {position['move']})")
+        elif position['time_to_solution'] > max(old['time_to_solution'] * slower,
+                                                old['time_to_solution'] + 10):
+            regressions.append(f"{position['id']}: solved in {position['time_to_solution']} ms \
+(was {old['time_to_solution']} ms)")
+
+    if result['solved'] < baseline['solved']:
+        regressions.append(f"Solved {result['solved']}/{result['total']} \
+(was {baseline['solved']}/{baseline['total']})")
+    return regressions
+
+def bench_epd(data: dict, path: str, output: str | None = None, baseline: str | None = None,
+              depth: int | None = None, movetime: int | None = None,
+              nodes: int | None = None) -> bool:
+    """
+    Run an EPD suite with the settings of `data`, print a report and optionally save it \
+and compare it with an earlier one.
+
+    Args:
+        data (dict): the setting data (same as `Engine`), its `Elo` is used.
+        path (str): the EPD file.
+        output (str | None, optional): write the result to this JSON file. Defaults to None.
+        baseline (str | None, optional): compare with this earlier JSON result. \
+Defaults to None.
+        depth (int | None, optional): plies per position. Defaults to None.
+        movetime (int | None, optional): milliseconds per position. Defaults to None.
+        nodes (int | None, optional): nodes per position. Defaults to None.
+
+    Returns:
+        bool: True if there is no regression.
+    """
+    suite: list[dict] = load_suite(path, data['Stockfish']['UCI_Chess960'])
+
+    # the GUI's game (history.json) is left alone
+    engine = Engine(data, history=False)
+    engine.set_elo(data['ChessAI']['Elo'])
+    engine.engine.print_command = False
+
+    def show(result: dict) -> None:
+        solution = f"{result['time_to_solution']} ms" if result['solved'] else 'no'
+        print(f"{result['id']:<24} {result['move'] or '-':<6} solved: {solution:<10} \
+depth: {result['depth']:<3} nps: {result['nps']}")
+
+    try:
+        result: dict = run_suite(engine, suite, depth, movetime, nodes, show)
+    finally:
+        engine.close()
+
+    print(f"Solved {result['solved']}/{result['total']}, {result['nps']} nps, \
+{result['time']:.1f} s")
+
+    if output is not None:
+        with open(output, mode='w', encoding='utf-8') as write_file:
+            json.dump(result, write_file, indent=4)
+            write_file.close()
+
+    if baseline is None:
+        return True
+    with open(baseline, mode='r', encoding='utf-8') as read_file:
+        regressions: list[str] = compare(result, json.load(read_file))
+        read_file.close()
+    for regression in regressions:
+        print(f'Regression: {regression}')
+    if not regressions:
+        print('No regression.')
+    return not regressions
+
+def free_memory() -> int | None:
+    """
+    Get the memory that can still be used.
+
+    Returns:
+        int | None: in MB, None if it can not be known on this system.
+    """
+    try:
+        with open('/proc/meminfo', mode='r', encoding='utf-8') as read_file:
+            for line in read_file:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') // (1 << 20)
+    except (AttributeError, ValueError, OSError): # eg: Windows
+        return None
+
+def tune_candidates(cpus: int, memory: int | None) -> list[tuple[int, int]]:
+    """
+    Get the `Threads` and `Hash` to try: powers of 2 up to every core, and 3 hash sizes \
+within half of the free memory.
+
+    Args:
+        cpus (int): the number of CPU cores.
+        memory (int | None): the free memory in MB (see `free_memory()`).
+
+    Returns:
+        list[tuple[int, int]]: (Threads, Hash in MB) pairs.
+    """
+    threads: list[int] = [1]
+    while threads[-1] * 2 < cpus:
+        threads.append(threads[-1] * 2)
+    if cpus > 1:
+        threads.append(cpus)
+
+    limit: int = memory // 2 if memory else 1024
+    hashes: list[int] = [size for size in (16, 256, 1024) if size <= max(16, limit)]
+    return [(thread, size) for thread in threads for size in hashes]
+
+def tune(data: dict, budget: float = 120.0, positions: tuple[str] = TUNE_POSITIONS,
+         on_result=None) -> dict:
+    """
+    Measure the nps and the time to depth of Stockfish under several `Threads` and `Hash` \
+(see `tune_candidates()`), the budget split evenly as `go movetime` per position.
+
+    The best pair reaches the deepest depth every pair reached in every position the \
+fastest (more nps on a tie).
+
+    Stockfish's `bench <hash> <threads> <depth>` is not used: it searches its ~50 positions \
+to a fixed depth however long that takes, and its summary (`Total time (ms)`, \
+`Nodes searched`, `Nodes/second`) covers the whole run, with no time per depth. The UCI \
+searches keep to the budget and give the time each depth is reached from their `info` lines.
+
+    Args:
+        data (dict): the setting data (same as `Engine`).
+        budget (float, optional): seconds for the whole run, it may take longer if that \
+leaves less than `TUNE_MIN_MOVETIME` per position. Defaults to 120.0.
+        positions (tuple[str], optional): the FENs searched. Defaults to `TUNE_POSITIONS`.
+        on_result (Callable | None, optional): called with each pair's result. \
+Defaults to None.
+
+    Returns:
+        dict: the `machine` (`node`, `system`, `processor`, `cpus`, free `memory` in MB and \
+`engine`), `budget`, `movetime` (ms per position), `depth` (the compared depth), \
+`results` (`threads`, `hash`, `nps`, `depth` reached on average, `time_to_depth` in ms and \
+`time` to the compared depth in ms) and `best` (`Threads` and `Hash`).
+    """
+    cpus: int = os.cpu_count() or 1
+    memory: int | None = free_memory()
+    candidates: list[tuple[int, int]] = tune_candidates(cpus, memory)
+    movetime: int = max(TUNE_MIN_MOVETIME,
+                        int(budget * 1000 / (len(candidates) * len(positions))))
+
+    # full strength, only the speed is measured
+    parameters: dict = dict(data['Stockfish'], UCI_LimitStrength=False)
+    engine = UCIEngine(path=data['ChessAI']['Engine'], parameters=parameters,
+                       print_command=False, transcript_path=None)
+
+    results: list[dict] = []
+    reached: list[list[dict]] = [] # every pair's time to depth (ms) of every position
+    try:
+        for threads, size in candidates:
+            engine.update_engine_parameters({'Threads': threads, 'Hash': size})
+            total_nodes: int = 0
+            total_time: int = 0
+            depths: list[dict] = []
+            for fen in positions:
+                # from an empty hash, so every pair starts the same
+                engine.new_game()
+                engine.put(f'position fen {fen}')
+                first: dict = {} # depth: ms
+                last: dict = {}
+                for info in engine.search(go_command(movetime=movetime)):
+                    if info['multipv'] == 1:
+                        first.setdefault(info['depth'], info.get('time', 0))
+                        last = info
+                depths.append(first)
+                total_nodes += last.get('nodes', 0)
+                total_time += last.get('time', 0)
+
+            result: dict = {
+                'threads': threads,
+                'hash': size,
+                'nps': int(total_nodes * 1000 / total_time) if total_time else 0,
+                'depth': sum(max(first, default=0) for first in depths) / len(depths),
+                'time_to_depth': {depth: sum(first[depth] for first in depths) / len(depths)
+                                  for depth in sorted(set.intersection(
+                                      *(set(first) for first in depths)))},
+            }
+            results.append(result)
+            reached.append(depths)
+            if on_result is not None:
+                on_result(result)
+        name: str = engine.name
+    finally:
+        engine.quit()
+
+    depth: int = min(max(first, default=0) for depths in reached for first in depths)
+    for result, depths in zip(results, reached):
+        result['time'] = sum(first.get(depth, 0) for first in depths) / len(depths)
+    best: dict = min(results, key=lambda result: (result['time'], -result['nps']))
+
+    return {
+        'machine': {
+            'node': platform.node(),
+            'system': platform.platform(),
+            'processor': platform.processor(),
+            'cpus': cpus,
+            'memory': memory,
+            'engine': name,
+        },
+        'budget': budget,
+        'movetime': movetime,
+        'depth': depth,
+        'results': results,
+        'best': {'Threads': best['threads'], 'Hash': best['hash']},
+    }
+
+def tune_settings(data: dict, budget: float = 120.0, output: str | None = None) -> dict:
+    """
+    Run `tune()` with a report, and optionally save the measurements.
+
+    Args:
+        data (dict): the setting data (same as `Engine`).
+        budget (float, optional): seconds for the whole run. Defaults to 120.0.
+        output (str | None, optional): write the result to this JSON file. Defaults to None.
+
+    Returns:
+        dict: the best `Threads` and `Hash`.
+    """
+    def show(result: dict) -> None:
+        print(f"Threads {result['threads']:<4} Hash {result['hash']:<6} \
+nps: {result['nps']:<10} depth: {result['depth']:.1f}")
+
+    result: dict = tune(data, budget, on_result=show)
+    print(f"Best: Threads {result['best']['Threads']}, Hash {result['best']['Hash']} \
+(depth {result['depth']} in {min(item['time'] for item in result['results']):.0f} ms)")
+
+    if output is not None:
+        with open(output, mode='w', encoding='utf-8') as write_file:
+            json.dump(result, write_file, indent=4)
+            write_file.close()
+    return result['best']
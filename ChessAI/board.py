@@ -0,0 +1,831 @@
+"""The board of ChessAI, a pure-Python bitboard move generator (no Stockfish needed)."""
+
+import random
+import re
+
+STARTING_FEN: str = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+FILE_NAMES: str = 'abcdefgh'
+RANK_NAMES: str = '12345678'
+
+WHITE: int = 0
+BLACK: int = 1
+
+PAWN: int = 1
+KNIGHT: int = 2
+BISHOP: int = 3
+ROOK: int = 4
+QUEEN: int = 5
+KING: int = 6
+
+PIECE_SYMBOLS: str = ' pnbrqk'
+
+BB_ALL: int = (1 << 64) - 1
+BB_SQUARES: tuple = tuple(1 << sq for sq in range(64))
+BB_FILES: tuple = tuple(0x0101010101010101 << file for file in range(8))
+BB_RANKS: tuple = tuple(0xff << (8 * rank) for rank in range(8))
+BB_BACKRANKS: tuple = (BB_RANKS[0], BB_RANKS[7])
+BB_CORNERS: int = (BB_FILES[0] | BB_FILES[7]) & (BB_RANKS[0] | BB_RANKS[7])
+
+# (file step, rank step). The first 4 are rook directions, the last 4 are bishop ones.
+DIRECTIONS: tuple = ((0, 1), (1, 0), (0, -1), (-1, 0), (1, 1), (1, -1), (-1, -1), (-1, 1))
+ROOK_DIRECTIONS: tuple = (0, 1, 2, 3)
+BISHOP_DIRECTIONS: tuple = (4, 5, 6, 7)
+
+# ('11111111', '8') ... ('11', '2'), for `Board.fen()`
+EMPTY_RUNS: tuple = tuple(('1' * count, str(count)) for count in range(8, 1, -1))
+
+# piece, from file, from rank, target, promotion (eg: Nbd7, exd8=Q, R1a3)
+SAN_REGEX = re.compile(r'^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQnbrq]))?$')
+
+def square_name(square: int) -> str:
+    """
+    Get the name of a square.
+
+    Args:
+        square (int): the square, from 0 (a1) to 63 (h8).
+
+    Returns:
+        str: the name (eg: e4).
+    """
+    return FILE_NAMES[square & 7] + RANK_NAMES[square >> 3]
+
+def parse_square(name: str) -> int:
+    """
+    Get the square from its name.
+
+    Args:
+        name (str): the name (eg: e4).
+
+    Raises:
+        ValueError: the name is not a square.
+
+    Returns:
+        int: the square, from 0 (a1) to 63 (h8).
+    """
+    try:
+        return SQUARE_INDEX[name]
+    except KeyError as err:
+        raise ValueError(f'Invalid square: {name}') from err
+
+SQUARE_NAMES: tuple = tuple(square_name(square) for square in range(64))
+SQUARE_INDEX: dict = {name: square for square, name in enumerate(SQUARE_NAMES)}
+
+def lsb(bb: int) -> int:
+    """Index of the least significant bit."""
+    return (bb & -bb).bit_length() - 1
+
+def msb(bb: int) -> int:
+    """Index of the most significant bit."""
+    return bb.bit_length() - 1
+
+def scan(bb: int):
+    """Yield every square of the bitboard."""
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+def popcount(bb: int) -> int:
+    """Number of squares in the bitboard."""
+    return bin(bb).count('1')
+
+def _step_attacks(steps: tuple) -> tuple:
+    attacks: list = []
+    for sq in range(64):
+        bb = 0
+        for file_step, rank_step in steps:
+            file, rank = (sq & 7) + file_step, (sq >> 3) + rank_step
+            if 0 <= file <= 7 and 0 <= rank <= 7:
+                bb |= 1 << (file + 8 * rank)
+        attacks.append(bb)
+    return tuple(attacks)
+
+def _rays() -> tuple:
+    rays: list = []
+    for file_step, rank_step in DIRECTIONS:
+        direction: list = []
+        for sq in range(64):
+            bb = 0
+            file, rank = (sq & 7) + file_step, (sq >> 3) + rank_step
+            while 0 <= file <= 7 and 0 <= rank <= 7:
+                bb |= 1 << (file + 8 * rank)
+                file, rank = file + file_step, rank + rank_step
+            direction.append(bb)
+        rays.append(tuple(direction))
+    return tuple(rays)
+
+# precomputed attack tables
+KNIGHT_ATTACKS: tuple = _step_attacks(
+    ((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)))
+KING_ATTACKS: tuple = _step_attacks(
+    ((0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1)))
+PAWN_ATTACKS: tuple = (_step_attacks(((-1, 1), (1, 1))), _step_attacks(((-1, -1), (1, -1))))
+RAYS: tuple = _rays()
+# a ray goes towards higher squares if its first step does
+RAY_POSITIVE: tuple = tuple(rank_step > 0 or (rank_step == 0 and file_step > 0)
+                            for file_step, rank_step in DIRECTIONS)
+
+def _between_and_line() -> tuple:
+    between = [[0] * 64 for _ in range(64)]
+    line = [[0] * 64 for _ in range(64)]
+    for direction in range(8):
+        opposite = direction ^ 2 # (0, 2), (1, 3), (4, 6), (5, 7) are opposite
+        for sq in range(64):
+            for target in scan(RAYS[direction][sq]):
+                between[sq][target] = RAYS[direction][sq] & RAYS[opposite][target]
+                line[sq][target] = RAYS[direction][sq] | RAYS[opposite][sq] | BB_SQUARES[sq]
+    return tuple(tuple(row) for row in between), tuple(tuple(row) for row in line)
+
+BETWEEN, LINE = _between_and_line()
+
+def _slider_attacks(square: int, occupied: int, directions: tuple) -> int:
+    attacks = 0
+    for direction in directions:
+        ray = RAYS[direction][square]
+        blockers = ray & occupied
+        if blockers:
+            blocker = lsb(blockers) if RAY_POSITIVE[direction] else msb(blockers)
+            ray ^= RAYS[direction][blocker]
+        attacks |= ray
+    return attacks
+
+def bishop_attacks(square: int, occupied: int) -> int:
+    """Squares a bishop on `square` attacks."""
+    return _slider_attacks(square, occupied, BISHOP_DIRECTIONS)
+
+def rook_attacks(square: int, occupied: int) -> int:
+    """Squares a rook on `square` attacks."""
+    return _slider_attacks(square, occupied, ROOK_DIRECTIONS)
+
+BISHOP_RAYS: tuple = tuple(bishop_attacks(sq, 0) for sq in range(64))
+ROOK_RAYS: tuple = tuple(rook_attacks(sq, 0) for sq in range(64))
+
+# Zobrist keys, fixed seed so hashes are the same on every run
+_random = random.Random(1391)
+ZOBRIST_PIECES: dict = {symbol: tuple(_random.getrandbits(64) for _ in range(64))
+                        for symbol in 'PNBRQKpnbrqk'}
+ZOBRIST_CASTLING: tuple = tuple(_random.getrandbits(64) for _ in range(64)) # by rook square
+ZOBRIST_EP: tuple = tuple(_random.getrandbits(64) for _ in range(8)) # by file
+ZOBRIST_TURN: int = _random.getrandbits(64)
+del _random
+
+def _castling_key(castling: int) -> int:
+    key = 0
+    for square in scan(castling):
+        key ^= ZOBRIST_CASTLING[square]
+    return key
+
+class Board:
+    """
+    A chess position, with legal moves generated in pure Python.
+
+    Args:
+        fen (str, optional): the FEN. Defaults to the starting position.
+        chess960 (bool, optional): castling moves are written as king takes rook. \
+Defaults to False.
+
+    Raises:
+        ValueError: the FEN can not be read.
+    """
+    def __init__(self, fen: str = STARTING_FEN, chess960: bool = False):
+        self.chess960: bool = chess960
+        self.set_fen(fen)
+
+    def set_fen(self, fen: str) -> None:
+        """
+        Set the position from a FEN.
+
+        Args:
+            fen (str): the FEN.
+
+        Raises:
+            ValueError: the FEN can not be read.
+        """
+        parts: list[str] = fen.split()
+        if not 1 <= len(parts) <= 6:
+            raise ValueError(f'Invalid FEN: {fen}')
+        parts += ['w', '-', '-', '0', '1'][len(parts) - 1:]
+
+        self.key: int = 0 # Zobrist hash, updated by every change
+        self.pieces: list[int] = [0] * 7 # indexed by piece type, 0 is unused
+        self.colors: list[int] = [0, 0]
+        self.squares: list[str] = [''] * 64 # piece symbol on each square, '' for empty
+
+        rows: list[str] = parts[0].split('/')
+        if len(rows) != 8:
+            raise ValueError(f'Invalid FEN: {fen}')
+        for index, row in enumerate(rows):
+            file = 0
+            for value in row:
+                if value.isdigit():
+                    file += int(value)
+                    continue
+                if value.lower() not in PIECE_SYMBOLS[1:] or file > 7:
+                    raise ValueError(f'Invalid FEN: {fen}')
+                self._set_piece(file + 8 * (7 - index), value)
+                file += 1
+            if file != 8:
+                raise ValueError(f'Invalid FEN: {fen}')
+
+        if parts[1] not in ('w', 'b'):
+            raise ValueError(f'Invalid FEN: {fen}')
+        self.turn: int = WHITE if parts[1] == 'w' else BLACK
+
+        self.castling: int = self._parse_castling(parts[2])
+
+        self.ep_square: int | None = None
+        if parts[3] != '-':
+            self.ep_square = parse_square(parts[3])
+
+        try:
+            self.halfmove: int = int(parts[4])
+            self.fullmove: int = int(parts[5])
+        except ValueError as err:
+            raise ValueError(f'Invalid FEN: {fen}') from err
+
+        self.key ^= _castling_key(self.castling)
+        if self.ep_square is not None:
+            self.key ^= ZOBRIST_EP[self.ep_square & 7]
+        if self.turn == BLACK:
+            self.key ^= ZOBRIST_TURN
+
+    def _set_piece(self, square: int, symbol: str) -> None:
+        bb = BB_SQUARES[square]
+        self.pieces[PIECE_SYMBOLS.index(symbol.lower())] |= bb
+        self.colors[WHITE if symbol.isupper() else BLACK] |= bb
+        self.squares[square] = symbol
+        self.key ^= ZOBRIST_PIECES[symbol][square]
+
+    def _remove_piece(self, square: int) -> str:
+        symbol = self.squares[square]
+        if symbol:
+            bb = BB_SQUARES[square]
+            self.pieces[PIECE_SYMBOLS.index(symbol.lower())] ^= bb
+            self.colors[WHITE if symbol.isupper() else BLACK] ^= bb
+            self.squares[square] = ''
+            self.key ^= ZOBRIST_PIECES[symbol][square]
+        return symbol
+
+    def _parse_castling(self, field: str) -> int:
+        """
+        Castling rights as a bitboard of the rooks that may castle. In standard chess, a right \
+without the king on the e-file and its rook in the corner is dropped.
+        """
+        castling = 0
+        if field == '-':
+            return castling
+        for value in field:
+            color = WHITE if value.isupper() else BLACK
+            backrank = BB_BACKRANKS[color]
+            rooks = self.pieces[ROOK] & self.colors[color] & backrank
+            king = self.pieces[KING] & self.colors[color] & backrank
+            if not king:
+                continue
+            king_file = lsb(king) & 7
+            if not self.chess960:
+                if king_file != 4:
+                    continue
+                rooks &= BB_CORNERS
+            match value.lower():
+                case 'k':
+                    # the outermost rook on the king side
+                    rooks &= ~(BB_ALL >> (63 - (lsb(king))))
+                    if rooks:
+                        castling |= BB_SQUARES[msb(rooks)]
+                case 'q':
+                    rooks &= BB_SQUARES[lsb(king)] - 1
+                    if rooks:
+                        castling |= BB_SQUARES[lsb(rooks)]
+                case file if file in FILE_NAMES and FILE_NAMES.index(file) != king_file:
+                    castling |= rooks & BB_FILES[FILE_NAMES.index(file)]
+                case _:
+                    raise ValueError(f'Invalid castling rights: {field}')
+        return castling
+
+    def castling_fen(self) -> str:
+        """
+        Get the castling field of the FEN.
+
+        Returns:
+            str: the castling field (eg: KQkq).
+        """
+        field: str = ''
+        for color in (WHITE, BLACK):
+            backrank = BB_BACKRANKS[color]
+            king = self.pieces[KING] & self.colors[color] & backrank
+            rooks = self.castling & backrank
+            if not king or not rooks:
+                continue
+            all_rooks = self.pieces[ROOK] & self.colors[color] & backrank
+            side: str = ''
+            for rook in sorted(scan(rooks), reverse=True):
+                if rook > lsb(king) and rook == msb(all_rooks):
+                    symbol = 'k'
+                elif rook < lsb(king) and rook == lsb(all_rooks):
+                    symbol = 'q'
+                else:
+                    symbol = FILE_NAMES[rook & 7]
+                side += symbol.upper() if color == WHITE else symbol
+            field += side
+        return field or '-'
+
+    def fen(self) -> str:
+        """
+        Get the FEN of the position.
+
+        Returns:
+            str: the FEN.
+        """
+        cells: list[str] = [symbol or '1' for symbol in self.squares]
+        placement: str = '/'.join([''.join(cells[start:start + 8]) for start in range(56, -8, -8)])
+        # count the empty squares, longest runs first
+        for run in EMPTY_RUNS:
+            placement = placement.replace(*run)
+
+        ep_square = '-' if self.ep_square is None else square_name(self.ep_square)
+        return f"{placement} {'wb'[self.turn]} {self.castling_fen()} {ep_square} \
+{self.halfmove} {self.fullmove}"
+
+    def copy(self) -> 'Board':
+        """
+        Copy the board.
+
+        Returns:
+            Board: the new board.
+        """
+        board = Board.__new__(Board)
+        board.chess960 = self.chess960
+        board.key = self.key
+        board.pieces = self.pieces.copy()
+        board.colors = self.colors.copy()
+        board.squares = self.squares.copy()
+        board.turn = self.turn
+        board.castling = self.castling
+        board.ep_square = self.ep_square
+        board.halfmove = self.halfmove
+        board.fullmove = self.fullmove
+        return board
+
+    def piece_at(self, square: int) -> str:
+        """
+        Get the piece on a square.
+
+        Args:
+            square (int): the square.
+
+        Returns:
+            str: the piece symbol (eg: 'P', 'n'), '' if empty.
+        """
+        return self.squares[square]
+
+    def king(self, color: int) -> int | None:
+        """Square of the king of that color, None if there is not any."""
+        king = self.pieces[KING] & self.colors[color]
+        return lsb(king) if king else None
+
+    def attackers(self, color: int, square: int, occupied: int | None = None) -> int:
+        """
+        Get the pieces of `color` attacking a square.
+
+        Args:
+            color (int): WHITE or BLACK.
+            square (int): the square.
+            occupied (int | None, optional): the occupancy to use. Defaults to the board's.
+
+        Returns:
+            int: bitboard of the attackers.
+        """
+        if occupied is None:
+            occupied = self.colors[WHITE] | self.colors[BLACK]
+        pieces = self.pieces
+        queens = pieces[QUEEN]
+        attackers = (PAWN_ATTACKS[color ^ 1][square] & pieces[PAWN])\
+            | (KNIGHT_ATTACKS[square] & pieces[KNIGHT])\
+            | (KING_ATTACKS[square] & pieces[KING])
+        if BISHOP_RAYS[square] & (pieces[BISHOP] | queens):
+            attackers |= bishop_attacks(square, occupied) & (pieces[BISHOP] | queens)
+        if ROOK_RAYS[square] & (pieces[ROOK] | queens):
+            attackers |= rook_attacks(square, occupied) & (pieces[ROOK] | queens)
+        return attackers & self.colors[color] & occupied
+
+    def is_check(self) -> bool:
+        """
+        Check if the side to move is in check.
+
+        Returns:
+            bool: True if in check.
+        """
+        king = self.king(self.turn)
+        return king is not None and bool(self.attackers(self.turn ^ 1, king))
+
+    def _pins(self, king: int) -> dict:
+        """Pinned pieces of the side to move, mapped to the line they can move on."""
+        pins: dict = {}
+        them = self.colors[self.turn ^ 1]
+        occupied = self.colors[WHITE] | self.colors[BLACK]
+        queens = self.pieces[QUEEN]
+        snipers = ((ROOK_RAYS[king] & (self.pieces[ROOK] | queens))
+                   | (BISHOP_RAYS[king] & (self.pieces[BISHOP] | queens))) & them
+        for sniper in scan(snipers):
+            blockers = BETWEEN[king][sniper] & occupied
+            if blockers and blockers & (blockers - 1) == 0 and blockers & self.colors[self.turn]:
+                pins[lsb(blockers)] = LINE[king][sniper]
+        return pins
+
+    def generate_legal_moves(self, from_mask: int = BB_ALL):
+        """
+        Yield every legal move as (from_square, to_square, promotion).
+
+        Args:
+            from_mask (int, optional): only moves starting from these squares. Defaults to all.
+        """
+        us = self.turn
+        them = us ^ 1
+        own = self.colors[us]
+        enemy = self.colors[them]
+        occupied = own | enemy
+        pieces = self.pieces
+
+        king = self.king(us)
+        if king is None:
+            return
+
+        checkers = self.attackers(them, king)
+
+        # the king
+        if from_mask & BB_SQUARES[king]:
+            without_king = occupied ^ BB_SQUARES[king]
+            for target in scan(KING_ATTACKS[king] & ~own):
+                if not self.attackers(them, target, without_king):
+                    yield king, target, None
+            if not checkers:
+                yield from self._castling_moves(king)
+
+        # only the king can escape double check
+        if checkers & (checkers - 1):
+            return
+
+        target_mask = ~own & BB_ALL
+        if checkers:
+            checker = lsb(checkers)
+            target_mask = BETWEEN[king][checker] | checkers
+
+        pins = self._pins(king)
+        movers = own & from_mask & ~pieces[KING]
+
+        for square in scan(movers & ~pieces[PAWN]):
+            symbol = self.squares[square].lower()
+            if symbol == 'n':
+                attacks = KNIGHT_ATTACKS[square]
+            elif symbol == 'b':
+                attacks = bishop_attacks(square, occupied)
+            elif symbol == 'r':
+                attacks = rook_attacks(square, occupied)
+            else:
+                attacks = bishop_attacks(square, occupied) | rook_attacks(square, occupied)
+            attacks &= target_mask
+            if square in pins:
+                attacks &= pins[square]
+            for target in scan(attacks):
+                yield square, target, None
+
+        # pawns
+        forward = 8 if us == WHITE else -8
+        last_rank = BB_BACKRANKS[them]
+        double_rank = BB_RANKS[3] if us == WHITE else BB_RANKS[4]
+        for square in scan(movers & pieces[PAWN]):
+            targets = PAWN_ATTACKS[us][square] & enemy
+            single = square + forward
+            if not occupied & BB_SQUARES[single]:
+                targets |= BB_SQUARES[single]
+                double = single + forward
+                if 0 <= double <= 63 and BB_SQUARES[double] & double_rank\
+                        and not occupied & BB_SQUARES[double]:
+                    targets |= BB_SQUARES[double]
+            targets &= target_mask
+            if square in pins:
+                targets &= pins[square]
+            for target in scan(targets):
+                if BB_SQUARES[target] & last_rank:
+                    for promotion in ('q', 'r', 'b', 'n'):
+                        yield square, target, promotion
+                else:
+                    yield square, target, None
+
+            if self.ep_square is not None and PAWN_ATTACKS[us][square] & BB_SQUARES[self.ep_square]:
+                if self._is_ep_legal(square, king):
+                    yield square, self.ep_square, None
+
+    def _is_ep_legal(self, square: int, king: int) -> bool:
+        """En passant removes 2 pieces from a line, so just test the result."""
+        captured = self.ep_square + (-8 if self.turn == WHITE else 8)
+        if not self.pieces[PAWN] & self.colors[self.turn ^ 1] & BB_SQUARES[captured]:
+            return False
+        occupied = (self.colors[WHITE] | self.colors[BLACK])\
+            ^ BB_SQUARES[square] ^ BB_SQUARES[captured] | BB_SQUARES[self.ep_square]
+        return not self.attackers(self.turn ^ 1, king, occupied)
+
+    def _castling_moves(self, king: int):
+        us = self.turn
+        backrank = BB_BACKRANKS[us]
+        if not BB_SQUARES[king] & backrank:
+            return
+        occupied = self.colors[WHITE] | self.colors[BLACK]
+        rank_start = 0 if us == WHITE else 56
+        for rook in scan(self.castling & self.colors[us] & self.pieces[ROOK] & backrank):
+            king_side = rook > king
+            king_to = rank_start + (6 if king_side else 2)
+            rook_to = rank_start + (5 if king_side else 3)
+
+            # every square the king and the rook go through must be empty (except themselves)
+            path = BETWEEN[king][king_to] | BB_SQUARES[king_to]\
+                | BETWEEN[rook][rook_to] | BB_SQUARES[rook_to]
+            if path & occupied & ~BB_SQUARES[king] & ~BB_SQUARES[rook]:
+                continue
+
+            # the king must not pass through an attacked square
+            without_king = occupied ^ BB_SQUARES[king]
+            if any(self.attackers(us ^ 1, square, without_king)
+                   for square in scan(BETWEEN[king][king_to])):
+                continue
+            after = occupied ^ BB_SQUARES[king] ^ BB_SQUARES[rook]\
+                | BB_SQUARES[king_to] | BB_SQUARES[rook_to]
+            if self.attackers(us ^ 1, king_to, after):
+                continue
+
+            if self.chess960:
+                yield king, rook, None
+            else:
+                yield king, king_to, None
+
+    def legal_moves(self, square: str | None = None) -> list[str]:
+        """
+        Get all legal moves.
+
+        Args:
+            square (str | None, optional): only moves of the piece on this square (eg: e2). \
+Defaults to None.
+
+        Returns:
+            list[str]: the moves, format by `{current}{moved}` (eg: e2e4, e7e8q).
+        """
+        from_mask = BB_ALL if square is None else BB_SQUARES[parse_square(square)]
+        return [square_name(frm) + square_name(to) + (promotion or '')
+                for frm, to, promotion in self.generate_legal_moves(from_mask)]
+
+    def is_legal(self, move: str) -> bool:
+        """
+        Check if the move is legal.
+
+        Args:
+            move (str): the move, format by `{current}{moved}` (eg: e2e4).
+
+        Returns:
+            bool: True if legal.
+        """
+        try:
+            return move in self.legal_moves(move[:2])
+        except ValueError:
+            return False
+
+    def parse_san(self, san: str) -> str:
+        """
+        Get the move written in standard algebraic notation (eg: Nf3, exd5, O-O, e8=Q+).
+
+        Args:
+            san (str): the move, check marks and annotations (+#!?) are ignored.
+
+        Raises:
+            ValueError: the move is not legal, or could be more than one move.
+
+        Returns:
+            str: the move, format by `{current}{moved}` (eg: g1f3).
+        """
+        text: str = san.rstrip('+#!?')
+        king = self.king(self.turn)
+
+        if text in ('O-O', 'O-O-O', '0-0', '0-0-0'):
+            king_side: bool = len(text) == 3
+            if king is not None and not self.is_check():
+                for frm, to, _ in self._castling_moves(king):
+                    # the target is the rook (Chess960) or where the king goes
+                    if (to > frm) == king_side:
+                        return square_name(frm) + square_name(to)
+            raise ValueError(f'Illegal move: {san}')
+
+        match = SAN_REGEX.match(text)
+        if match is None:
+            raise ValueError(f'Invalid move: {san}')
+        symbol, file, rank, target, promotion = match.groups()
+
+        piece: int = PIECE_SYMBOLS.index(symbol.lower()) if symbol else PAWN
+        from_mask: int = self.pieces[piece] & self.colors[self.turn]
+        if file:
+            from_mask &= BB_FILES[FILE_NAMES.index(file)]
+        if rank:
+            from_mask &= BB_RANKS[RANK_NAMES.index(rank)]
+        to_square: int = SQUARE_INDEX[target]
+        promotion = promotion.lower() if promotion else None
+        # a pawn capture is always written with its file (eg: exd5)
+        if piece == PAWN and not file:
+            from_mask &= BB_FILES[to_square & 7]
+
+        # most moves: find who can get there and check the king is safe after
+        if piece != KING and king is not None and to_square != self.ep_square:
+            squares = self._san_candidates(piece, from_mask, to_square, promotion, king)
+            if len(squares) != 1:
+                raise ValueError(f'{"Ambiguous" if squares else "Illegal"} move: {san}')
+            return SQUARE_NAMES[squares[0]] + target + (promotion or '')
+
+        found: list[str] = []
+        for frm, to, promo in self.generate_legal_moves(from_mask):
+            # castling is only written as O-O
+            if to == to_square and promo == promotion\
+                    and not (piece == KING and abs((to & 7) - (frm & 7)) > 1):
+                found.append(square_name(frm) + square_name(to) + (promo or ''))
+        if len(found) != 1:
+            raise ValueError(f'{"Ambiguous" if found else "Illegal"} move: {san}')
+        return found[0]
+
+    def _san_candidates(self, piece: int, from_mask: int, to_square: int,
+                        promotion: str | None, king: int) -> list[int]:
+        """Squares of `from_mask` that can legally move a non-king `piece` to `to_square` \
+(not en passant)."""
+        us = self.turn
+        own = self.colors[us]
+        occupied = own | self.colors[us ^ 1]
+        target = BB_SQUARES[to_square]
+        if own & target:
+            return []
+
+        if piece == PAWN:
+            # the pawn has to promote on the last rank, and only there
+            if bool(target & BB_BACKRANKS[us ^ 1]) != (promotion is not None):
+                return []
+            if occupied & target:
+                candidates = PAWN_ATTACKS[us ^ 1][to_square] & from_mask
+            else:
+                behind = to_square - 8 if us == WHITE else to_square + 8
+                if not 0 <= behind <= 63:
+                    return []
+                candidates = from_mask & BB_SQUARES[behind]
+                double_rank = BB_RANKS[3] if us == WHITE else BB_RANKS[4]
+                if not candidates and target & double_rank and not occupied & BB_SQUARES[behind]:
+                    candidates = from_mask & BB_SQUARES[behind - 8 if us == WHITE else behind + 8]
+        elif promotion is not None:
+            return []
+        elif piece == KNIGHT:
+            candidates = KNIGHT_ATTACKS[to_square] & from_mask
+        elif piece == BISHOP:
+            candidates = bishop_attacks(to_square, occupied) & from_mask
+        elif piece == ROOK:
+            candidates = rook_attacks(to_square, occupied) & from_mask
+        else:
+            candidates = (bishop_attacks(to_square, occupied)
+                          | rook_attacks(to_square, occupied)) & from_mask
+
+        found: list[int] = []
+        for square in scan(candidates):
+            # the captured piece (on `to_square`) can not attack anymore
+            after = occupied ^ BB_SQUARES[square] | target
+            if not self.attackers(us ^ 1, king, after) & ~target:
+                found.append(square)
+        return found
+
+    def push(self, move: str) -> None:
+        """
+        Play a move. The move is not checked, use `is_legal()` for it.
+
+        Args:
+            move (str): the move, format by `{current}{moved}` (eg: e2e4).
+
+        Raises:
+            ValueError: there is no piece of the side to move on the starting square.
+        """
+        frm, to = parse_square(move[:2]), parse_square(move[2:4])
+        promotion = move[4:5].lower()
+        us = self.turn
+        symbol = self.squares[frm]
+        if not symbol or (symbol.isupper()) != (us == WHITE):
+            raise ValueError(f'Cannot make move: {move}')
+        piece = PIECE_SYMBOLS.index(symbol.lower())
+        captured = self.squares[to]
+
+        ep_square = self.ep_square
+        self.ep_square = None
+        castling = self.castling
+        if ep_square is not None:
+            self.key ^= ZOBRIST_EP[ep_square & 7]
+        # king takes own rook (Chess960) or king moves 2 files (standard)
+        is_castling = piece == KING and (
+            (captured and (captured.isupper()) == (us == WHITE))
+            or abs((to & 7) - (frm & 7)) > 1)
+
+        self.halfmove += 1
+        if piece == PAWN or (captured and not is_castling):
+            self.halfmove = 0
+        if is_castling:
+            rank_start = frm & 56
+            if captured:
+                rook = to
+            else:
+                rook = rank_start + (7 if to > frm else 0)
+                if not self.castling & BB_SQUARES[rook]:
+                    rook = msb(self.castling & BB_BACKRANKS[us]) if to > frm\
+                        else lsb(self.castling & BB_BACKRANKS[us])
+            king_side = rook > frm
+            self._remove_piece(frm)
+            rook_symbol = self._remove_piece(rook)
+            self._set_piece(rank_start + (6 if king_side else 2), symbol)
+            self._set_piece(rank_start + (5 if king_side else 3), rook_symbol)
+            self.castling &= ~BB_BACKRANKS[us]
+        else:
+            self._remove_piece(frm)
+            if captured:
+                self._remove_piece(to)
+            if piece == PAWN:
+                if to == ep_square:
+                    self._remove_piece(to - 8 if us == WHITE else to + 8)
+                elif abs(to - frm) == 16:
+                    # only keep the en passant square if an enemy pawn can take
+                    middle = (frm + to) // 2
+                    if PAWN_ATTACKS[us][middle] & self.pieces[PAWN] & self.colors[us ^ 1]:
+                        self.ep_square = middle
+                if promotion:
+                    symbol = promotion.upper() if us == WHITE else promotion
+            self._set_piece(to, symbol)
+            if piece == KING:
+                self.castling &= ~BB_BACKRANKS[us]
+            self.castling &= ~(BB_SQUARES[frm] | BB_SQUARES[to])
+
+        if us == BLACK:
+            self.fullmove += 1
+        self.turn = us ^ 1
+
+        self.key ^= ZOBRIST_TURN ^ _castling_key(castling ^ self.castling)
+        if self.ep_square is not None:
+            self.key ^= ZOBRIST_EP[self.ep_square & 7]
+
+def is_fen_valid(fen: str, chess960: bool = False) -> bool:
+    """
+    Check if the FEN is a position Stockfish can play, without starting Stockfish.
+
+    Args:
+        fen (str): the FEN.
+        chess960 (bool, optional): Chess960 castling rights are allowed, otherwise they \
+need the king on e1/e8 and the rook in its corner. Defaults to False.
+
+    Returns:
+        bool: True if the FEN is valid.
+    """
+    parts: list[str] = fen.split()
+    if len(parts) != 6:
+        return False
+    try:
+        board = Board(fen, chess960=chess960)
+    except ValueError:
+        return False
+
+    if not parts[4].isdigit() or not parts[5].isdigit() or int(parts[5]) < 1:
+        return False
+
+    for color in (WHITE, BLACK):
+        own = board.colors[color]
+        if popcount(board.pieces[KING] & own) != 1:
+            return False
+        if popcount(own) > 16 or popcount(board.pieces[PAWN] & own) > 8:
+            return False
+    if board.pieces[PAWN] & (BB_BACKRANKS[WHITE] | BB_BACKRANKS[BLACK]):
+        return False
+
+    # every castling right needs its king and rook at home (dropped by `Board` if not)
+    if parts[2] != '-':
+        rooks: int = 0
+        for value in parts[2]:
+            try:
+                rook = board._parse_castling(value)
+            except ValueError:
+                return False
+            if not rook or rook & rooks:
+                return False
+            rooks |= rook
+
+    # the en passant square must be right behind a pawn that just moved 2 squares
+    if board.ep_square is not None:
+        ep_square = board.ep_square
+        if board.turn == WHITE:
+            rank, pawn, origin = 5, ep_square - 8, ep_square + 8
+        else:
+            rank, pawn, origin = 2, ep_square + 8, ep_square - 8
+        occupied = board.colors[WHITE] | board.colors[BLACK]
+        if ep_square >> 3 != rank\
+                or occupied & (BB_SQUARES[ep_square] | BB_SQUARES[origin])\
+                or not board.pieces[PAWN] & board.colors[board.turn ^ 1] & BB_SQUARES[pawn]:
+            return False
+
+    # the side not to move can not be in check, and nobody gets checked 3 times
+    if board.attackers(board.turn, board.king(board.turn ^ 1)):
+        return False
+    checkers = board.attackers(board.turn ^ 1, board.king(board.turn))
+    return popcount(checkers) <= 2
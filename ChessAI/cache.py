@@ -0,0 +1,143 @@
+"""The analysis cache of ChessAI, so positions are not searched twice."""
+
+import json
+import threading
+from collections import OrderedDict
+
+def covers(analysis: dict, multipv: int = 1, limits: dict | None = None) -> bool:
+    """
+    Check if a known analysis answers a search: it has as many moves, and it reached one of \
+the search's limits (where the search would stop too). One cut short by `stable` only \
+answers (any) search that may stop early too.
+
+    Args:
+        analysis (dict): the analysis, with `depth`, `nodes`, `time`, `multipv`, `limits` \
+(`depth`, `movetime` and `nodes` it was searched with) and `stable` (True if cut short).
+        multipv (int, optional): how many best moves. Defaults to 1.
+        limits (dict | None, optional): `depth`, `movetime`, `nodes` and `stable` of the \
+search (see `Engine.search_limits()`), None for any analysis. Defaults to None.
+
+    Returns:
+        bool: True if the analysis is as good as the search would give.
+    """
+    if analysis.get('multipv', 1) < multipv:
+        return False
+    if limits is None:
+        return True
+    if analysis.get('stable'):
+        return bool(limits.get('stable'))
+
+    depth: int = analysis['depth']
+    time: int = analysis.get('time', 0)
+    nodes: int = analysis.get('nodes', 0)
+    # not stopped by its depth, it ran to its nodes or movetime (the last info comes a bit before)
+    searched: dict = analysis.get('limits') or {}
+    if not (searched.get('depth') and depth >= searched['depth']):
+        if searched.get('nodes') and (nodes >= searched['nodes'] or not searched.get('movetime')):
+            nodes = max(nodes, searched['nodes'])
+        elif searched.get('movetime'):
+            time = max(time, searched['movetime'])
+
+    return bool(limits.get('depth') and depth >= limits['depth']
+                or limits.get('movetime') and time >= limits['movetime']
+                or limits.get('nodes') and nodes >= limits['nodes'])
+
+def rank(analysis: dict) -> tuple:
+    """How good an analysis is, to keep the best: not cut short first, then deeper, then with \
+more moves."""
+    return (not analysis.get('stable', False), analysis['depth'], analysis.get('multipv', 1))
+
+class AnalysisCache:
+    """
+    Least recently used cache of `Engine.analyse()` results.
+
+    Args:
+        max_entries (int, optional): most results kept. Defaults to 4096.
+        max_bytes (int, optional): most (estimated) bytes kept. Defaults to 16 MB.
+    """
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 16 * 1024 * 1024):
+        self.max_entries: int = max_entries
+        self.max_bytes: int = max_bytes
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.size: int = 0 # estimated bytes
+
+        self._entries: OrderedDict = OrderedDict() # key: (analysis, size)
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, multipv: int = 1, limits: dict | None = None) -> dict | None:
+        """
+        Get a cached analysis.
+
+        Args:
+            key (tuple): the position hash and the engine parameters.
+            multipv (int, optional): the analysis must have this many moves. Defaults to 1.
+            limits (dict | None, optional): the analysis must answer a search with these \
+limits (see `covers()`), None for any. Defaults to None.
+
+        Returns:
+            dict | None: the analysis, None if missed.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not covers(entry[0], multipv, limits):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: tuple, analysis: dict) -> None:
+        """
+        Cache an analysis. It does not replace a better one (see `rank()`).
+
+        Args:
+            key (tuple): the position hash and the engine parameters.
+            analysis (dict): the analysis, with `depth` and `multipv` (see `covers()`).
+        """
+        size: int = len(json.dumps(analysis)) + 64 # + the key and the bookkeeping
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+                # one order, so two results never keep replacing each other
+                if rank(old[0]) >= rank(analysis):
+                    analysis, size = old
+
+            self._entries[key] = (analysis, size)
+            self.size += size
+
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self.size > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove every result (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        """
+        Get the counters, to size the cache.
+
+        Returns:
+            dict: hits, misses, hit rate, evictions, entries and bytes.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.size,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,76 +1,733 @@
-"""The engine of ChessAI, using stockfish."""
+"""The engine of ChessAI, talks UCI to Stockfish through asyncio."""
 
+import asyncio
 import json
 import pathlib
 import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 
-from stockfish import Stockfish, StockfishException
+from stockfish import StockfishException
+
+from .board import STARTING_FEN, WHITE, Board, is_fen_valid
+from .book import OpeningBook
+from .cache import AnalysisCache, covers
+from .metrics import NO_REPLIES, REPLIES, Metrics
+from .store import AnalysisStore
 
 PROJECT_PATH: str = pathlib.Path(__file__).parent
+# the last commands and output lines of a crashed Stockfish
+TRANSCRIPT_PATH: pathlib.Path = PROJECT_PATH / 'transcript.log'
+
+# commands and output lines kept in `UCIClient.transcript`
+TRANSCRIPT_SIZE: int = 2000
+# least seconds between two commands printed to the terminal
+ECHO_INTERVAL: float = 0.1
+# seconds to wait for a reply (eg: `readyok`), searches have no timeout by default
+COMMAND_TIMEOUT: float = 10.0
 
-# R.I.P the legend himself o7
-class ModifiedStockfish(Stockfish):
+class UCIClient:
     """
-    Modified stockfish module so that it can print out commands.
+    An asyncio client of one UCI engine process. Its output is read by one task and parsed \
+line by line as it comes, so many clients can share one event loop.
 
     Args:
-        ... (Stockfish's default arguments)
-        print_command (bool): whether to print commands to the terminal. Default is True.
+        path (str): the engine (eg: Stockfish's executable).
+        print_command (bool, optional): whether to print commands to the terminal (throttled \
+by `ECHO_INTERVAL`). Defaults to False.
+        transcript_path (str | None, optional): write the transcript here on a crash, None for \
+nowhere. Defaults to `TRANSCRIPT_PATH`.
     """
-    print_command: bool = False # initialize the attribute
+    metrics: Metrics | None = None # set by `Engine`, nothing is timed without it
 
-    # My code:
-    def __init__(self, *args, print_command: bool = True, **kwargs):
-        super().__init__(*args, **kwargs)
-
-        self.crashed: bool = False
+    def __init__(self, path: str, print_command: bool = False,
+                 transcript_path: str | None = TRANSCRIPT_PATH):
+        self.path: str = str(path)
         self.print_command: bool = print_command
-    # so the credit is given
-
-    def _put(self, command: str) -> None:
-        if not self._stockfish.stdin:
-            raise BrokenPipeError()
-        if self._stockfish.poll() is None and not self._has_quit_command_been_sent:
-            # My code:
-            if self.print_command:
-                print(f'\r{(os.get_terminal_size().columns) * ' '}', end='') # clear line
-                print(f'\rLast Input: {command}', end='')
-                if command == 'quit':
-                    print('')
-            # so the credit is given
-            self._stockfish.stdin.write(f"{command}\n")
-            self._stockfish.stdin.flush()
-            if command == "quit":
-                self._has_quit_command_been_sent = True
-
-    def _read_line(self) -> str:
-        if not self._stockfish.stdout:
-            raise BrokenPipeError()
-        if self._stockfish.poll() is not None:
-            # My code:
-            self.crashed = True
-            #
-            raise StockfishException("The Stockfish process has crashed")
-        return self._stockfish.stdout.readline().strip()
+        self.transcript_path: str | None = transcript_path
+        self.name: str = '' # from `id name`
+        self.options: dict = {} # name: type, default (and min, max, var) from `option`
+        self.transcript: deque = deque(maxlen=TRANSCRIPT_SIZE) # (monotonic time, '>' or '<', line)
+        self.last_echo: float = 0.0
+        self.waiting: tuple | None = None # (command, sent at) of the timed command
+        self.crashed: bool = False
+
+        # dummy attributes
+        self._process = None
+        self._lines: asyncio.Queue | None = None # None once the output has ended
+        self._reader: asyncio.Task | None = None
+        self._quitting: bool = False
+
+    async def start(self, timeout: float | None = COMMAND_TIMEOUT) -> None:
+        """
+        Start the process and read its `id` and `option` lines until `uciok`.
+
+        Args:
+            timeout (float | None, optional): seconds to wait for `uciok`. \
+Defaults to `COMMAND_TIMEOUT`.
+
+        Raises:
+            OSError: the engine can not be run.
+            TimeoutError: no `uciok` in time.
+            StockfishException: the process has exited.
+        """
+        self._process = await asyncio.create_subprocess_exec(
+            self.path, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        self._lines = asyncio.Queue()
+        self._reader = asyncio.create_task(self._read_loop())
+
+        self.send('uci')
+        try:
+            async with asyncio.timeout(timeout):
+                while (line := await self._next_line()) != 'uciok':
+                    if line.startswith('id name '):
+                        self.name = line[8:]
+                    elif line.startswith('option name '):
+                        self._parse_option(line)
+        except BaseException:
+            # not a UCI engine (or a hung one), do not leave its process behind
+            self._quitting = True
+            if self._process.returncode is None:
+                self._process.kill()
+            await self._process.wait()
+            self._reader.cancel()
+            raise
+
+    def _parse_option(self, line: str) -> None:
+        """Read an `option` line (eg: `option name Hash type spin default 16 min 1 max 1024`)."""
+        name, _, rest = line[12:].partition(' type ')
+        words: list[str] = rest.split()
+        if not words:
+            return
+        option: dict = {'type': words[0], 'default': None, 'var': []}
+        field: str | None = None
+        for word in words[1:]:
+            if word in ('default', 'min', 'max', 'var'):
+                field = word
+                if field == 'var':
+                    option['var'].append('')
+                else:
+                    option[field] = ''
+            elif field == 'var':
+                option['var'][-1] = f"{option['var'][-1]} {word}".strip()
+            elif field is not None:
+                option[field] = f'{option[field]} {word}'.strip()
+
+        if option['default'] == '<empty>':
+            option['default'] = ''
+        if option['type'] == 'spin':
+            for field in ('default', 'min', 'max'):
+                if option.get(field) not in (None, ''):
+                    option[field] = int(option[field])
+        elif option['type'] == 'check':
+            option['default'] = option['default'] == 'true'
+        self.options[name] = option
+
+    @property
+    def pid(self) -> int | None:
+        """The process id, None until started."""
+        return self._process.pid if self._process is not None else None
+
+    @property
+    def exited(self) -> bool:
+        """Whether the process has exited (or crashed) without `quit()`."""
+        return self.crashed or (self._process is not None
+                                and self._process.returncode is not None and not self._quitting)
+
+    async def _read_loop(self) -> None:
+        """Read every output line as soon as it comes, then None once the process has exited."""
+        while line := await self._process.stdout.readline():
+            text: str = line.decode('utf-8', errors='replace').strip()
+            now: float = time.monotonic()
+            self.transcript.append((now, '<', text))
+            if self.waiting is not None and text.startswith(REPLIES[self.waiting[0]]):
+                self.metrics.command(self.waiting[0], now - self.waiting[1])
+                self.waiting = None
+            self._lines.put_nowait(text)
+        self._lines.put_nowait(None)
+
+    async def _next_line(self) -> str:
+        """
+        Wait for the next output line.
+
+        Raises:
+            StockfishException: the process has exited.
+        """
+        line: str | None = await self._lines.get()
+        if line is None:
+            self._lines.put_nowait(None) # every later read fails too
+            if not self.crashed and not self._quitting:
+                self.crashed = True
+                self.dump_transcript(self.transcript_path)
+            raise StockfishException("The Stockfish process has crashed" + (
+                f" (its last commands are in {self.transcript_path})"
+                if self.transcript_path is not None else ''))
+        return line
+
+    def _echo(self, command: str) -> None:
+        """Print the last command, at most once every `ECHO_INTERVAL`."""
+        now: float = time.monotonic()
+        if now - self.last_echo < ECHO_INTERVAL and command != 'quit':
+            return
+        self.last_echo = now
+
+        columns: int = shutil.get_terminal_size().columns # falls back without a terminal
+        print(f'\r{columns * ' '}', end='') # clear line
+        print(f'\rLast Input: {command}', end='')
+        if command == 'quit':
+            print('')
+
+    def dump_transcript(self, path: str | None = None) -> str:
+        """
+        Get the last commands and output lines, with the seconds since the first one kept.
+
+        Args:
+            path (str | None, optional): also write it to this file. Defaults to None.
+
+        Returns:
+            str: one line each (eg: `   12.345 > go depth 15`).
+        """
+        entries: list[tuple] = list(self.transcript)
+        begin: float = entries[0][0] if entries else 0.0
+        text: str = ''.join(f'{moment - begin:9.3f} {way} {line}\n'
+                            for moment, way, line in entries)
+        if path is not None:
+            with open(path, mode='w', encoding='utf-8') as write_file:
+                write_file.write(text)
+                write_file.close()
+        return text
+
+    def send(self, command: str) -> None:
+        """
+        Send a command (nothing is sent once the process has exited).
+
+        Args:
+            command (str): the command (eg: `go depth 15`).
+        """
+        if self._process is None or self._process.returncode is not None or self._quitting:
+            return
+        sent: float = time.monotonic()
+        self.transcript.append((sent, '>', command))
+        if self.print_command:
+            self._echo(command)
+        name: str = command.split(' ', 1)[0]
+        if self.metrics is not None and name in REPLIES:
+            self.waiting = (name, sent)
+
+        try:
+            self._process.stdin.write(f'{command}\n'.encode('utf-8'))
+        except (BrokenPipeError, ConnectionResetError): # it is read as crashed right after
+            return
+
+        if self.metrics is not None and name in NO_REPLIES:
+            self.metrics.command(name, time.monotonic() - sent)
+        if command == 'quit':
+            self._quitting = True
+
+    async def isready(self, timeout: float | None = COMMAND_TIMEOUT) -> None:
+        """
+        Wait until every command sent before is done.
+
+        Args:
+            timeout (float | None, optional): seconds. Defaults to `COMMAND_TIMEOUT`.
+
+        Raises:
+            TimeoutError: no `readyok` in time.
+            StockfishException: the process has exited.
+        """
+        self.send('isready')
+        async with asyncio.timeout(timeout):
+            while await self._next_line() != 'readyok':
+                pass
+
+    async def search(self, command: str, on_info=None,
+                     timeout: float | None = None) -> tuple[list[dict], str | None]:
+        """
+        Run a `go` command and read its output until `bestmove`. When cancelled or timed out, \
+Stockfish is stopped and the rest of its output is skipped before raising.
+
+        Args:
+            command (str): the `go` command (see `go_command()`).
+            on_info (Callable | None, optional): called with every parsed info line \
+(see `parse_info()`). Defaults to None.
+            timeout (float | None, optional): seconds. Defaults to None (no limit).
+
+        Raises:
+            TimeoutError: no `bestmove` in time.
+            StockfishException: the process has exited.
+
+        Returns:
+            tuple[list[dict], str | None]: the parsed info lines and the best move (None if \
+there is no legal move).
+        """
+        lines: list[dict] = []
+        self.send(command)
+        try:
+            async with asyncio.timeout(timeout):
+                while not (line := await self._next_line()).startswith('bestmove'):
+                    info = parse_info(line)
+                    if info is None or 'type' not in info:
+                        continue
+                    lines.append(info)
+                    if on_info is not None:
+                        on_info(info)
+        except (asyncio.CancelledError, TimeoutError):
+            # Stockfish is still searching, its `bestmove` must not be read as the next reply
+            self.send('stop')
+            try:
+                async with asyncio.timeout(COMMAND_TIMEOUT):
+                    while not (await self._next_line()).startswith('bestmove'):
+                        pass
+            except (TimeoutError, StockfishException):
+                pass
+            raise
+
+        words: list[str] = line.split()
+        return lines, words[1] if len(words) > 1 and words[1] != '(none)' else None
+
+    async def quit(self, timeout: float | None = COMMAND_TIMEOUT) -> None:
+        """
+        Send `quit` and wait for the process to exit, it is killed after `timeout` seconds.
+
+        Args:
+            timeout (float | None, optional): seconds. Defaults to `COMMAND_TIMEOUT`.
+        """
+        if self._process is None:
+            return
+        self.send('quit')
+        self._quitting = True
+        try:
+            async with asyncio.timeout(timeout):
+                await self._process.wait()
+        except TimeoutError:
+            self._process.kill()
+            await self._process.wait()
+        await self._reader
+
+class UCIEngine:
+    """
+    A Stockfish driven by `UCIClient`. The client runs on an event loop thread shared by every \
+engine and each method here blocks until it is done, so the callers stay synchronous.
+
+    Args:
+        path (str): the engine (eg: Stockfish's executable).
+        depth (int, optional): the depth of a search without limit. Defaults to 15.
+        parameters (dict | None, optional): the UCI options to set. Defaults to None.
+        print_command (bool, optional): whether to print commands to the terminal (throttled \
+by `ECHO_INTERVAL`). Defaults to True.
+        timeout (float | None, optional): seconds to start and for every `isready`. \
+Defaults to `COMMAND_TIMEOUT`.
+        transcript_path (str | None, optional): see `UCIClient`. Defaults to `TRANSCRIPT_PATH`.
+
+    Raises:
+        OSError: the engine can not be run.
+        TimeoutError: the engine did not answer in time.
+        StockfishException: the engine has exited.
+    """
+    loop: asyncio.AbstractEventLoop | None = None # shared by every engine
+    loop_lock = threading.Lock()
+
+    def __init__(self, path: str, depth: int = 15, parameters: dict | None = None,
+                 print_command: bool = True, timeout: float | None = COMMAND_TIMEOUT,
+                 transcript_path: str | None = TRANSCRIPT_PATH):
+        self.client: UCIClient = UCIClient(path, print_command, transcript_path)
+        self.timeout: float | None = timeout
+        self.depth: str = str(depth)
+
+        self.call(self.client.start(timeout), None)
+        # the engine's defaults, then what is set
+        self._parameters: dict = {name: option['default']
+                                  for name, option in self.client.options.items()
+                                  if option['type'] != 'button'}
+        if 'UCI_ShowWDL' in self.client.options:
+            parameters = dict({'UCI_ShowWDL': True}, **(parameters or {}))
+        self.update_engine_parameters(parameters)
+
+    @classmethod
+    def event_loop(cls) -> asyncio.AbstractEventLoop:
+        """The event loop of every client, run on a daemon thread from the first call."""
+        with cls.loop_lock:
+            if cls.loop is None:
+                cls.loop = asyncio.new_event_loop()
+                threading.Thread(target=cls.loop.run_forever, name='UCIEventLoop',
+                                 daemon=True).start()
+            return cls.loop
+
+    def call(self, coroutine, timeout: float | None = None):
+        """
+        Run a coroutine of the client on the event loop and wait for it.
+
+        Args:
+            coroutine (Coroutine): eg: `self.client.isready()`.
+            timeout (float | None, optional): seconds, then it is cancelled. Defaults to None.
+
+        Raises:
+            TimeoutError: not done in time.
+
+        Returns:
+            Any: what the coroutine returns.
+        """
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.event_loop())
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    @property
+    def name(self) -> str:
+        """The engine's name (eg: Stockfish 16.1)."""
+        return self.client.name
+
+    @property
+    def crashed(self) -> bool:
+        """Whether the process has exited without `quit()`."""
+        return self.client.exited
+
+    @property
+    def print_command(self) -> bool:
+        """Whether to print commands to the terminal."""
+        return self.client.print_command
+
+    @print_command.setter
+    def print_command(self, value: bool) -> None:
+        self.client.print_command = value
+
+    @property
+    def metrics(self) -> Metrics | None:
+        """Where commands are timed."""
+        return self.client.metrics
+
+    @metrics.setter
+    def metrics(self, value: Metrics | None) -> None:
+        self.client.metrics = value
+
+    def dump_transcript(self, path: str | None = None) -> str:
+        """Same as `UCIClient.dump_transcript()`."""
+        return self.client.dump_transcript(path)
+
+    def put(self, command: str) -> None:
+        """
+        Send a command without waiting (eg: `stop`). Commands are sent in the order given.
+
+        Args:
+            command (str): the command.
+        """
+        self.event_loop().call_soon_threadsafe(self.client.send, command)
+
+    def isready(self) -> None:
+        """Wait until every command sent before is done."""
+        self.call(self.client.isready(self.timeout))
+
+    def get_parameters(self) -> dict:
+        """
+        Get the UCI options as they are set.
+
+        Returns:
+            dict: name: value.
+        """
+        return self._parameters
+
+    def set_option(self, name: str, value) -> bool:
+        """
+        Set a UCI option without waiting, only if it is not set to that already (eg: `Hash` \
+reallocates the table every time it is sent). Options the engine does not have are only kept \
+in `get_parameters()`.
+
+        Args:
+            name (str): the option (eg: MultiPV).
+            value (Any): its value.
+
+        Returns:
+            bool: True if it was sent.
+        """
+        option: dict | None = self.client.options.get(name)
+        if option is not None and option['type'] == 'spin':
+            value = int(value)
+        elif option is not None and option['type'] == 'check' and not isinstance(value, bool):
+            value = str(value).lower() == 'true'
+        # `get_parameters()` is what the engine has applied, from its defaults on
+        if name in self._parameters and self._parameters[name] == value:
+            return False
+        self._parameters[name] = value
+
+        if option is None or option['type'] == 'button':
+            return False
+        text: str = ('true' if value else 'false') if isinstance(value, bool) else str(value)
+        self.put(f'setoption name {name} value {text}')
+        return True
+
+    def update_engine_parameters(self, parameters: dict | None) -> None:
+        """
+        Set the UCI options that changed (`Hash` after `Threads`, as recommended), then wait \
+for them with one `isready`. Nothing is sent if none changed.
+
+        Args:
+            parameters (dict | None): name: value.
+        """
+        if not parameters:
+            return
+        values: dict = dict(parameters)
+        if 'Threads' in values and 'Hash' in values:
+            values['Hash'] = values.pop('Hash')
+        sent: list[bool] = [self.set_option(name, value)
+                            for name, value in values.items() if value is not None]
+        if any(sent):
+            self.isready()
+
+    def set_elo_rating(self, elo: int = 1350) -> None:
+        """
+        Play at an elo.
+
+        Args:
+            elo (int, optional): the elo. Defaults to 1350.
+        """
+        self.update_engine_parameters({'UCI_LimitStrength': True, 'UCI_Elo': elo})
+
+    def set_depth(self, depth: int = 15) -> None:
+        """
+        Set the depth of a search without limit.
+
+        Args:
+            depth (int, optional): plies. Defaults to 15.
+        """
+        self.depth = str(depth)
+
+    def new_game(self) -> None:
+        """Send `ucinewgame` (clears the hash) and wait for it."""
+        self.put('ucinewgame')
+        self.isready()
+
+    def search(self, command: str, on_info=None, timeout: float | None = None) -> list[dict]:
+        """
+        Run a `go` command until `bestmove`. `on_info` is called on this thread, while the \
+event loop keeps reading.
+
+        Args:
+            command (str): the `go` command (see `go_command()`).
+            on_info (Callable | None, optional): called with every parsed info line. \
+Defaults to None.
+            timeout (float | None, optional): seconds, then Stockfish is stopped. \
+Defaults to None (no limit).
+
+        Raises:
+            TimeoutError: no `bestmove` in time.
+            StockfishException: the engine has exited.
+
+        Returns:
+            list[dict]: the parsed info lines (see `parse_info()`).
+        """
+        infos: queue.Queue = queue.Queue()
+
+        async def run() -> tuple:
+            try:
+                return await self.client.search(command, infos.put, timeout)
+            finally:
+                infos.put(None)
+
+        future = asyncio.run_coroutine_threadsafe(run(), self.event_loop())
+        try:
+            while (info := infos.get()) is not None:
+                if on_info is not None:
+                    on_info(info)
+        except BaseException:
+            future.cancel() # stops Stockfish
+            raise
+        return future.result()[0]
+
+    def stop(self) -> None:
+        """Stop the running search (if any). Returns immediately."""
+        self.put('stop')
+
+    def set_affinity(self, cpus: set[int]) -> bool:
+        """
+        Pin every thread of the engine to these CPUs, the threads it starts later follow. \
+Only on Linux.
+
+        Args:
+            cpus (set[int]): the logical CPUs (see `os.sched_getaffinity()`).
+
+        Returns:
+            bool: True if pinned.
+        """
+        pid: int | None = self.client.pid
+        if pid is None or not hasattr(os, 'sched_setaffinity'):
+            return False
+        try:
+            # `sched_setaffinity(pid)` only pins the main thread, the search threads are tasks
+            tasks: list[str] = os.listdir(f'/proc/{pid}/task')
+        except OSError:
+            tasks = [str(pid)]
+        try:
+            for task in tasks:
+                os.sched_setaffinity(int(task), cpus)
+        except ProcessLookupError: # the thread has ended meanwhile
+            pass
+        except OSError:
+            return False
+        return True
+
+    def quit(self) -> None:
+        """Quit the engine, it is killed if it does not exit in time."""
+        try:
+            self.call(self.client.quit(self.timeout))
+        except (TimeoutError, OSError):
+            pass
+
+def parse_info(line: str) -> dict | None:
+    """
+    Read an `info` line of Stockfish.
+
+    Args:
+        line (str): the line (eg: `info depth 12 multipv 1 score cp 30 ... pv e2e4 e7e5`).
+
+    Returns:
+        dict | None: depth, seldepth, multipv, score type and value, nodes, nps, time and pv. \
+None if the line is not a search info.
+    """
+    words: list[str] = line.split()
+    if not words or words[0] != 'info' or 'depth' not in words or 'currmove' in words:
+        return None
+
+    info: dict = {'multipv': 1, 'pv': []}
+    index = 1
+    while index < len(words):
+        word = words[index]
+        if word in ('depth', 'seldepth', 'multipv', 'nodes', 'nps', 'time', 'hashfull', 'tbhits'):
+            info[word] = int(words[index + 1])
+            index += 2
+        elif word == 'score':
+            info['type'] = words[index + 1]
+            info['value'] = int(words[index + 2])
+            index += 3
+            if index < len(words) and words[index] in ('lowerbound', 'upperbound'):
+                info['bound'] = words[index]
+                index += 1
+        elif word == 'wdl':
+            info['wdl'] = [int(value) for value in words[index + 1:index + 4]]
+            index += 4
+        elif word == 'pv':
+            info['pv'] = words[index + 1:]
+            break
+        else:
+            index += 1
+    return info
+
+def summarize(lines: dict, last: dict, compare: int) -> dict:
+    """
+    Turn the last info line of every MultiPV line into an analysis.
+
+    Args:
+        lines (dict): multipv: the last parsed info line (see `parse_info()`) of it.
+        last (dict): the last parsed info line, for nodes, nps and time.
+        compare (int): 1 if white to move, else -1 (Stockfish scores for the side to move).
+
+    Returns:
+        dict: same as `Engine.analyse()`.
+    """
+    main = lines.get(1, last)
+    return {
+        'type': main['type'],
+        'value': main['value'] * compare,
+        'mate': main['value'] * compare if main['type'] == 'mate' else None,
+        'depth': main['depth'],
+        'seldepth': main.get('seldepth', main['depth']),
+        'nodes': last.get('nodes', 0),
+        'nps': last.get('nps', 0),
+        'time': last.get('time', 0),
+        'moves': [{
+            'Move': line['pv'][0],
+            'Centipawn': line['value'] * compare if line['type'] == 'cp' else None,
+            'Mate': line['value'] * compare if line['type'] == 'mate' else None,
+            'PV': line['pv'],
+        } for _, line in sorted(lines.items())],
+    }
+
+def go_command(depth: int | None = None, movetime: int | None = None,
+               nodes: int | None = None) -> str:
+    """
+    Get the `go` command of a search limit. With none given, search until `stop`.
+
+    Args:
+        depth (int | None, optional): plies. Defaults to None.
+        movetime (int | None, optional): milliseconds. Defaults to None.
+        nodes (int | None, optional): nodes. Defaults to None.
+
+    Returns:
+        str: the command (eg: `go depth 15`).
+    """
+    command: str = 'go'
+    for name, value in (('depth', depth), ('movetime', movetime), ('nodes', nodes)):
+        if value is not None:
+            command += f' {name} {value}'
+    return command if command != 'go' else 'go infinite'
 
 class Engine:
     """
     Main engine of ChessAI, it connects to Stockfish.
 
+    Args:
+        data (dict): the setting data.
+        background (bool, optional): start Stockfish on a thread, `ready` is set when done. \
+Until then the position is only kept in `board`. Defaults to False.
+        history (bool, optional): keep the game in history.json and the crashes in \
+transcript.log, for the GUI. False for the command line, so it leaves the GUI's game alone. \
+Defaults to True.
+
     Raises:
-        FileNotFoundError: Cannot find history.json file. For `move()` and `restart_engine()`.
+        FileNotFoundError: Cannot find history.json file. For `move()`.
     """
 
     current_move: int = 0
 
-    def __init__(self, data):
+    def __init__(self, data, background: bool = False, history: bool = True):
         self.data = data
+        self.history: bool = history
+
+        # Stockfish is talked to by the GUI and by the analysis thread
+        self.lock = threading.RLock()
+        self.search_id: int = 0 # bumped by `stop()`, older searches are skipped
+        self.searching: bool = False
 
-        self.engine: object = ModifiedStockfish(path=self.data['ChessAI']['Engine'],
-                                                parameters={'UCI_LimitStrength': True})
+        # the position Stockfish is on, moves are applied here so it never has to be asked
+        self.board: Board = Board(chess960=self.data['Stockfish']['UCI_Chess960'])
+        # the game, sent as `position fen <root> moves ...` so Stockfish keeps its hash
+        self.root: str = STARTING_FEN
+        self.line: list[tuple[str, str]] = [] # (move, FEN after it), undone ones kept for redo
+        self.ply: int = 0 # moves of `line` played
+        self.cache: AnalysisCache = AnalysisCache()
+        self.uci_metrics: Metrics = Metrics()
 
-        self.engine.update_engine_parameters(self.data['Stockfish'])
+        # optional, results on disk survive restarts
+        store_path: str = self.data['ChessAI'].get('Analysis Store', '')
+        self.store: AnalysisStore | None = AnalysisStore(store_path) if store_path else None
+        # optional, book moves are given without searching
+        book_path: str = self.data['ChessAI'].get('Opening Book', '')
+        self.book: OpeningBook | None = OpeningBook(book_path) if book_path else None
 
+        # optional, a warm standby swapped in when Stockfish crashes
+        self.spare: UCIEngine | None = None
+        self.spare_thread: threading.Thread | None = None
+        self.restarts: int = 0
+
+        self.engine: object = None
+        self.ready = threading.Event()
+        self.start_error: Exception | None = None
+        self.start_thread: threading.Thread | None = None
+        if background:
+            self.start_thread = threading.Thread(target=self._start_background,
+                                                 name='EngineStart', daemon=True)
+            self.start_thread.start()
+        else:
+            self._start()
+
+        if not self.history:
+            return
         with open(PROJECT_PATH / 'history.json', mode="w", encoding="utf-8") as write_file:
             data: dict = {
                 '0': {
@@ -80,61 +737,495 @@ class Engine:
             json.dump(data, write_file, indent=4)
             write_file.close()
 
-    def restart_engine(self) -> None:
+    def _spawn(self) -> UCIEngine:
+        """Start a Stockfish with the parameters of `data['Stockfish']`."""
+        engine = UCIEngine(path=self.data['ChessAI']['Engine'], print_command=False,
+                           parameters=dict({'UCI_LimitStrength': True}, **self.data['Stockfish']),
+                           transcript_path=TRANSCRIPT_PATH if self.history else None)
+        engine.metrics = self.uci_metrics
+        return engine
+
+    def _start(self) -> None:
+        """Start Stockfish on the position `board` is on (it may have moved meanwhile)."""
+        engine = self._spawn()
+        engine.print_command = True
+        with self.lock:
+            self.engine = engine
+            if self.root != STARTING_FEN or self.ply:
+                self._send_position()
+            self.ready.set()
+
+        if self.data['ChessAI'].get('Hot Spare', False):
+            self._prepare_spare()
+
+    def _start_background(self) -> None:
+        try:
+            self._start()
+        except (OSError, TimeoutError, StockfishException) as err:
+            self.start_error = err
+            self.ready.set()
+
+    def wait_ready(self) -> None:
         """
-        Automatically restart Stockfish when notified as crashed.
+        Wait until Stockfish has started.
 
         Raises:
-            FileNotFoundError: Cannot find history.json file.
+            OSError | TimeoutError | StockfishException: Stockfish could not start.
         """
+        self.ready.wait()
+        if self.start_error is not None:
+            raise self.start_error
+
+    def _prepare_spare(self) -> None:
+        """Start a new spare in the background (the GUI should not wait for it)."""
+        def start() -> None:
+            try:
+                self.spare = self._spawn()
+            except (OSError, TimeoutError, StockfishException):
+                self.spare = None
+
+        self.spare = None
+        self.spare_thread = threading.Thread(target=start, name='EngineSpare', daemon=True)
+        self.spare_thread.start()
+
+    def _take_spare(self) -> UCIEngine | None:
+        """The spare if it is ready and alive, else None."""
+        if self.spare_thread is None or self.spare_thread.is_alive():
+            return None
+        spare, self.spare = self.spare, None
+        if spare is None or spare.crashed:
+            return None
+        return spare
+
+    def _catch_up(self, engine: UCIEngine) -> None:
+        """Send what was changed since `engine` was started (eg: elo, MultiPV)."""
+        changed: dict = {name: value for name, value in self.engine.get_parameters().items()
+                         if engine.get_parameters().get(name) != value}
+        engine.update_engine_parameters(changed)
+        engine.set_depth(self.engine.depth)
+
+    def restart_engine(self) -> None:
+        """Automatically restart Stockfish when notified as crashed."""
         # exit if not crashed.
         if not self.engine.crashed:
             return
 
-        self.engine = ModifiedStockfish(self.data['ChessAI']['Engine'],
-                                        parameters={'UCI_LimitStrength': True})
+        # what led to the crash
+        self.engine.dump_transcript(self.engine.client.transcript_path)
 
-        self.engine.update_engine_parameters(self.data['Stockfish'])
+        engine = self._take_spare() or self._spawn()
+        self._catch_up(engine)
+        engine.print_command = True
+        self.engine = engine
+        self.restarts += 1
 
-        try:
-            with open(PROJECT_PATH / 'history.json', mode="r", encoding="utf-8") as read_file:
-                data: dict = json.load(read_file)
-                read_file.close()
-        except FileNotFoundError as err:
-            raise FileNotFoundError('Cannot access history.json file') from err
+        # the position is kept in memory, no need to read history.json
+        self._send_position()
 
-        if len(data) == 1:
-            self.engine.set_fen_position(data['0']['fen'])
-        else:
-            self.engine.set_fen_position(data[str(len(data) - 2)]['fen'])
+        if self.data['ChessAI'].get('Hot Spare', False):
+            self._prepare_spare()
+
+        print('Complete restart Stockfish. Used the current position.')
+
+    def close(self) -> None:
+        """Stop searching, write what is waiting to the analysis store and quit Stockfish \
+and the spare."""
+        self.stop()
+        if self.start_thread is not None:
+            self.start_thread.join()
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+        if self.spare_thread is not None:
+            self.spare_thread.join()
+        if self.spare is not None:
+            self.spare.quit()
+            self.spare = None
+        with self.lock:
+            if self.engine is not None:
+                self.engine.quit()
+
+    def stop(self) -> None:
+        """Stop the running search (if any) and skip the ones waiting. Returns immediately."""
+        self.search_id += 1
+        if self.searching:
+            self.engine.stop()
+
+    def _search(self, on_info=None, search_id: int | None = None,
+                command: str | None = None) -> list[dict]:
+        """
+        Run `go` and read Stockfish's output until `bestmove`.
+
+        Args:
+            on_info (Callable | None, optional): called with every parsed info line. \
+Defaults to None.
+            search_id (int | None, optional): skip the search if `stop()` was called since. \
+Defaults to None.
+            command (str | None, optional): the `go` command (see `go_command()`). \
+Defaults to the engine's depth.
+
+        Returns:
+            list[dict]: the parsed info lines, empty if skipped.
+        """
+        with self.lock:
+            self.restart_engine()
+
+            if search_id is not None and search_id != self.search_id:
+                return []
+
+            depth_times: dict = {} # depth: seconds to reach it
+            stopped: list[bool] = [False]
+            start: float = time.monotonic()
+
+            def update(info: dict) -> None:
+                # `stop()` may have come right before `searching` was set
+                if search_id is not None and search_id != self.search_id and not stopped[0]:
+                    stopped[0] = True
+                    self.engine.stop()
+                if info['depth'] not in depth_times:
+                    depth_times[info['depth']] = time.monotonic() - start
+                if on_info is not None:
+                    on_info(info)
+
+            self.searching = True
+            try:
+                lines: list[dict] = self.engine.search(
+                    command or go_command(depth=self.engine.depth), update)
+            finally:
+                self.searching = False
+            self.uci_metrics.search(lines[-1] if lines else {}, depth_times,
+                                    time.monotonic() - start)
+            return lines
+
+    def metrics(self) -> dict:
+        """
+        Get the latency of UCI commands (`position`, `go`, `setoption`, `isready`) and \
+the nodes, nps and time to depth of searches, since the start or `reset_metrics()`.
+
+        Returns:
+            dict: see `Metrics.snapshot()`.
+        """
+        return self.uci_metrics.snapshot()
+
+    def reset_metrics(self) -> None:
+        """Start the metrics from zero."""
+        self.uci_metrics.reset()
+
+    def search(self, depth: int | None = None, movetime: int | None = None,
+               nodes: int | None = None, on_info=None) -> list[dict]:
+        """
+        Search the current position under a limit, without the cache (eg: for benchmarks).
+
+        Args:
+            depth (int | None, optional): plies. Defaults to None.
+            movetime (int | None, optional): milliseconds. Defaults to None.
+            nodes (int | None, optional): nodes. Defaults to None.
+            on_info (Callable | None, optional): called with every parsed info line. \
+Defaults to None.
+
+        Returns:
+            list[dict]: the parsed info lines (see `parse_info()`).
+        """
+        self.wait_ready()
+        if depth is None and movetime is None and nodes is None:
+            depth = int(self.engine.depth)
+        return self._search(on_info, command=go_command(depth, movetime, nodes))
+
+    def _white_side(self) -> int:
+        """1 if white to move, else -1 (Stockfish scores for the side to move)."""
+        return 1 if self.get_fen().split()[1] == 'w' else -1
+
+    def game(self) -> tuple[str, list[str]]:
+        """
+        Get the game played so far, the undone moves (kept for redo) included.
+
+        Returns:
+            tuple[str, list[str]]: the FEN it started from and its moves (eg: e2e4).
+        """
+        with self.lock:
+            return self.root, [move for move, _ in self.line]
+
+    def _engine_version(self) -> str:
+        """Results of another Stockfish version are not reused."""
+        return self.engine.name
+
+    def _cache_key(self, board: Board | None = None) -> tuple:
+        """The position (`board` or the current one) and every parameter that changes the \
+result of a search."""
+        parameters: dict = self.engine.get_parameters()
+        board = board or self.board
+        return (board.key, parameters.get('UCI_LimitStrength'), parameters.get('UCI_Elo'),
+                parameters.get('Threads'), parameters.get('Hash'), parameters.get('UCI_Chess960'))
+
+    def analyse(self, fen: str | None = None, multipv: int = 2, on_info=None,
+                search_id: int | None = None, depth: int | None = None,
+                movetime: int | None = None, nodes: int | None = None, stable: int = 0,
+                infinite: bool = False) -> dict:
+        """
+        Get the evaluation and the best moves from one search. It stops at the first limit \
+reached, with no limit at the engine's depth. In the opening book, the book moves are given \
+instead (except for an infinite search).
+
+        Args:
+            fen (str | None, optional): the FEN. Defaults to the current position.
+            multipv (int, optional): how many best moves. Defaults to 2.
+            on_info (Callable | None, optional): called with the analysis at every depth. \
+Defaults to None.
+            search_id (int | None, optional): skip if `stop()` was called since. Defaults to None.
+            depth (int | None, optional): plies. Defaults to None.
+            movetime (int | None, optional): milliseconds. Defaults to None.
+            nodes (int | None, optional): nodes. Defaults to None.
+            stable (int, optional): stop once the best move stayed the same for this many \
+depths, 0 to never. Defaults to 0.
+            infinite (bool, optional): search until `stop()` (`go infinite`), the limits are \
+ignored and the result is not cached. Defaults to False.
+
+        Returns:
+            dict: `type` and `value` of the evaluation (positive for white), `mate` (None if \
+no mate), `depth`, `seldepth`, `nodes`, `nps`, `time` and `moves`, a list of `Move`, \
+`Centipawn`, `Mate` and `PV`. `limits` are the `depth`, `movetime` and `nodes` it was \
+searched with, `stable` is True if it stopped early for it. `cached` is True if it comes from \
+`cache`, `book` is True if it comes from the opening book (see `OpeningBook.analysis()`). \
+Empty if skipped.
+        """
+        self.wait_ready()
+        with self.lock:
+            if fen is not None:
+                self.set_fen(fen)
+
+            if self.book is not None and not infinite:
+                booked: dict = self.book.analysis(self.board, multipv)
+                if booked:
+                    if on_info is not None:
+                        on_info(dict(booked))
+                    return booked
+
+            if infinite:
+                depth = movetime = nodes = None
+                stable = 0
+            elif depth is None and movetime is None and nodes is None:
+                depth = int(self.engine.depth)
+            # a known result must have searched as far as this search would (see `covers()`)
+            limits: dict = {'depth': depth, 'movetime': movetime, 'nodes': nodes, 'stable': stable}
+            key: tuple = self._cache_key()
+            cached = self.cache.get(key, multipv, limits)
+
+            stored: dict | None = None
+            if cached is None and self.store is not None:
+                stored = self.store.get(key[0], self._engine_version(), repr(key[1:]))
+                if stored is not None and covers(stored, multipv, limits):
+                    self.cache.put(key, stored)
+                    cached, stored = stored, None
+
+            # an infinite search is never deep enough, the known result is only shown first
+            if infinite and cached is not None:
+                cached, stored = None, cached
+
+            if cached is not None:
+                analysis: dict = dict(cached, moves=cached['moves'][:multipv], cached=True)
+                if on_info is not None:
+                    on_info(dict(analysis))
+                return analysis
+
+            # show the old (not deep enough) result right away while searching
+            if stored is not None and on_info is not None:
+                on_info(dict(stored, moves=stored['moves'][:multipv], cached=True))
+
+            compare = self._white_side()
+
+            lines: dict = {}
+            analysis: dict = {}
+            best: dict = {'move': None, 'depth': 0, 'count': 0} # how long the best move stayed
+
+            def update(info: dict) -> None:
+                if not info['pv']:
+                    return
+                lines[info['multipv']] = info
+
+                analysis.update(summarize(lines, info, compare))
+                if on_info is not None and (stored is None or stored['depth'] < analysis['depth']):
+                    on_info(dict(analysis))
+
+                if stable and info['multipv'] == 1 and info['depth'] > best['depth']:
+                    if info['pv'][0] == best['move']:
+                        best['count'] += 1
+                    else:
+                        best['move'], best['count'] = info['pv'][0], 1
+                    best['depth'] = info['depth']
+                    if best['count'] == stable:
+                        self.engine.stop()
+
+            # kept for the next analysis, which most likely asks for the same
+            self.engine.set_option('MultiPV', multipv)
+            started_id: int = self.search_id
+            self._search(update, search_id, go_command(depth, movetime, nodes))
+
+            # a search cut by `stop()` is not kept (a stable best move is fine)
+            if analysis and self.search_id == started_id and not infinite:
+                analysis['multipv'] = multipv
+                analysis['limits'] = {'depth': depth, 'movetime': movetime, 'nodes': nodes}
+                analysis['stable'] = bool(stable) and best['count'] >= stable
+                self.cache.put(key, dict(analysis))
+                if self.store is not None:
+                    self.store.put(key[0], self._engine_version(), repr(key[1:]), analysis)
+            return analysis
 
-        print('Complete restart Stockfish. Used the previous position.')
+    def peek(self, multipv: int = 2) -> dict:
+        """
+        Get the cached analysis of the current position, deep enough for the settings, \
+without searching.
+
+        Args:
+            multipv (int, optional): how many best moves. Defaults to 2.
+
+        Returns:
+            dict: same as `analyse()`, empty if not cached (or Stockfish is not started yet).
+        """
+        if not self.ready.is_set() or self.engine is None:
+            return {}
+        # as far as `analyse()` would search
+        limits: dict = self.search_limits()
+        if limits['depth'] is None and limits['movetime'] is None and limits['nodes'] is None:
+            limits['depth'] = int(self.engine.depth)
+        with self.lock:
+            cached = self.cache.get(self._cache_key(), multipv, limits)
+        if cached is None:
+            return {}
+        return dict(cached, moves=cached['moves'][:multipv], cached=True)
+
+    def speculate(self, moves: list[str], multipv: int = 2, search_id: int | None = None,
+                  depth: int | None = None, movetime: int | None = None,
+                  nodes: int | None = None) -> int:
+        """
+        Analyse the positions after the likely next moves (eg: the top moves) into the cache, \
+so `analyse()` answers at once if one of them is played. The game is not changed, and it \
+gives up at the first `stop()` (any real request).
+
+        Args:
+            moves (list[str]): the moves from the current position (eg: e2e4).
+            multipv (int, optional): how many best moves. Defaults to 2.
+            search_id (int | None, optional): skip if `stop()` was called since. Defaults to None.
+            depth (int | None, optional): plies. Defaults to None.
+            movetime (int | None, optional): milliseconds. Defaults to None.
+            nodes (int | None, optional): nodes. Defaults to None.
+
+        Returns:
+            int: the number of positions analysed (cached and book ones are skipped).
+        """
+        self.wait_ready()
+        if depth is None and movetime is None and nodes is None:
+            depth = int(self.engine.depth)
+
+        limits: dict = {'depth': depth, 'movetime': movetime, 'nodes': nodes}
+        done: int = 0
+        with self.lock:
+            try:
+                for move in moves:
+                    if search_id is not None and search_id != self.search_id:
+                        break
+                    if not self.board.is_legal(move):
+                        continue
+                    board: Board = self.board.copy()
+                    board.push(move)
+                    key: tuple = self._cache_key(board)
+                    if self.cache.get(key, multipv, limits) is not None\
+                            or self.book is not None and self.book.analysis(board, multipv):
+                        continue
+
+                    lines: dict = {}
+                    last: dict = {}
+                    def update(info: dict) -> None:
+                        nonlocal last
+                        if info['pv']:
+                            lines[info['multipv']] = last = info
+
+                    self.engine.put(self._position_command((move,)))
+                    self.engine.set_option('MultiPV', multipv)
+                    started_id: int = self.search_id
+                    self._search(update, search_id, go_command(depth, movetime, nodes))
+                    if not lines or self.search_id != started_id:
+                        continue
+
+                    analysis: dict = summarize(lines, last, 1 if board.turn == WHITE else -1)
+                    analysis.update(multipv=multipv, limits=dict(limits), stable=False)
+                    self.cache.put(key, dict(analysis))
+                    if self.store is not None:
+                        self.store.put(key[0], self._engine_version(), repr(key[1:]), analysis)
+                    done += 1
+            finally:
+                # back to the game, the next request may not send it
+                if not self.engine.crashed:
+                    self._send_position()
+        return done
+
+    def search_limits(self, adaptive: bool = False) -> dict:
+        """
+        Get the search limits of the settings (0 is no limit).
+
+        Args:
+            adaptive (bool, optional): for "Analyse Every Move", also stop once the best move \
+stayed the same for "Stable Depths" depths, or at "Max Time". Defaults to False.
 
+        Returns:
+            dict: `depth`, `movetime`, `nodes` and `stable` for `analyse()`.
+        """
+        setting: dict = self.data['ChessAI']
+        limits: dict = {
+            'depth': int(setting.get('Depth', 0)) or None,
+            'movetime': int(setting.get('Movetime', 0)) or None,
+            'nodes': int(setting.get('Nodes', 0)) or None,
+            'stable': 0,
+        }
+        if adaptive:
+            ceiling: int = int(setting.get('Max Time', 0))
+            if ceiling and (limits['movetime'] is None or ceiling < limits['movetime']):
+                limits['movetime'] = ceiling
+            limits['stable'] = int(setting.get('Stable Depths', 0))
+        return limits
 
-    def get_stats(self) -> dict:
+    def get_stats(self, on_info=None, search_id: int | None = None, **limits) -> dict:
         """
         Get current evaluation.
 
+        Args:
+            on_info (Callable | None, optional): called with the evaluation at every depth. \
+Defaults to None.
+            search_id (int | None, optional): skip if `stop()` was called since. Defaults to None.
+            **limits: `depth`, `movetime`, `nodes` and `stable` of `analyse()`.
+
         Returns:
             dict: the evaluation.
         """
-        self.restart_engine()
+        def update(analysis: dict) -> None:
+            on_info({'type': analysis['type'], 'value': analysis['value']})
 
-        return self.engine.get_evaluation()
+        analysis = self.analyse(None, 1, update if on_info else None, search_id, **limits)
+        if not analysis:
+            return {}
+        return {'type': analysis['type'], 'value': analysis['value']}
 
-    def get_top_moves(self) -> tuple[str]:
+    def get_top_moves(self, on_info=None, search_id: int | None = None,
+                      **limits) -> tuple[str]:
         """
         Get 2 best moves.
 
+        Args:
+            on_info (Callable | None, optional): called with the best moves at every depth. \
+Defaults to None.
+            search_id (int | None, optional): skip if `stop()` was called since. Defaults to None.
+            **limits: `depth`, `movetime`, `nodes` and `stable` of `analyse()`.
+
         Returns:
             tuple[str]: tuple of best move.
         """
-        self.restart_engine()
-
-        top1, top2, *etc = self.engine.get_top_moves(2)
-        del etc # if something goes wrong.
+        def update(analysis: dict) -> None:
+            on_info(tuple(move['Move'] for move in analysis['moves']))
 
-        return (top1['Move'], top2['Move'])
+        analysis = self.analyse(None, 2, update if on_info else None, search_id, **limits)
+        return tuple(move['Move'] for move in analysis.get('moves', []))
 
     def settings(self, parameters: dict | None) -> None:
         """
@@ -143,9 +1234,11 @@ class Engine:
         Args:
             parameters (dict | None): the parameters of Stockfish.
         """
-        self.restart_engine()
+        self.wait_ready()
+        with self.lock:
+            self.restart_engine()
 
-        self.engine.update_engine_parameters(parameters)
+            self.engine.update_engine_parameters(parameters)
 
     def set_elo(self, elo: int=1350) -> None:
         """
@@ -154,20 +1247,61 @@ class Engine:
         Args:
             elo (int, optional): min goes 1320, max goes 3190. Defaults to 1350.
         """
-        self.restart_engine()
+        self.wait_ready()
+        with self.lock:
+            self.restart_engine()
+
+            self.engine.set_elo_rating(elo)
+
+    def _position_command(self, then: tuple[str] = ()) -> str:
+        """The `position` command of the game: its root and the moves played since (and \
+`then` these)."""
+        moves: list[str] = [move for move, _ in self.line[:self.ply]] + list(then)
+        if not moves:
+            return f'position fen {self.root}'
+        return f"position fen {self.root} moves {' '.join(moves)}"
+
+    def _send_position(self, new_game: bool = False) -> None:
+        """Send the position, after `ucinewgame` (clears the hash) for a `new_game`."""
+        if new_game:
+            self.engine.new_game()
+        self.engine.put(self._position_command())
+
+    def set_fen(self, fen: str, new_game: bool = False) -> None:
+        """
+        Set current FEN position. A position of the game (eg: undo, redo) is sent as moves \
+from its root, so Stockfish keeps its hash, any other starts a new game.
+
+        Args:
+            fen (str): the FEN.
+            new_game (bool, optional): start a new game (clear the hash) even if the position \
+is in the game. Defaults to False.
+        """
+        with self.lock:
+            fens: list[str] = [self.root] + [after for _, after in self.line]
+            if new_game or fen not in fens:
+                self.root, self.line, self.ply, new_game = fen, [], 0, True
+            elif fens[self.ply] == fen:
+                return # already there
+            else:
+                self.ply = fens.index(fen)
+
+            self.board = Board(fen, chess960=self.data['Stockfish']['UCI_Chess960'])
+            # Stockfish gets it once started
+            if not self.ready.is_set():
+                return
+            self.restart_engine()
 
-        self.engine.set_elo_rating(elo)
+            self._send_position(new_game)
 
     def get_fen(self) -> str:
         """
-        Get current FEN position.
+        Get current FEN position, from `board` (no talking to Stockfish).
 
         Returns:
             str: the FEN.
         """
-        self.restart_engine()
-
-        return self.engine.get_fen_position()
+        return self.board.fen()
 
     def check_valid(self, fen: str) -> bool:
         """
@@ -179,9 +1313,7 @@ class Engine:
         Returns:
             bool: True if the FEN is valid.
         """
-        self.restart_engine()
-
-        return self.engine.is_fen_valid(fen=fen)
+        return is_fen_valid(fen, self.data['Stockfish']['UCI_Chess960'])
 
     def check_move(self, move: str) -> bool:
         """
@@ -193,34 +1325,41 @@ class Engine:
         Returns:
             bool: True if possible.
         """
-        self.restart_engine()
-
-        # for Stockfish 16 and below:
-        if not self.engine.is_move_correct(move):
-            return False
-
-        # for Stockfish 17+ (it skips errors)
-        fen = self.get_fen()
-        self.engine.make_moves_from_current_position(move)
-        if fen == self.get_fen():
-            return False
-        self.engine.set_fen_position(fen)
-        return True
+        return self.board.is_legal(move)
 
-    def move(self, move: str) -> None:
+    def move(self, move: str | list[str]) -> None:
         """
         Move the piece.
 
         Args:
-            move (str): the move, format by `{current}{moved}` (eg: e2e4).
+            move (str | list[str]): the move(s), format by `{current}{moved}` (eg: e2e4).
 
         Raises:
+            ValueError: a move is not legal (nothing is moved then).
             FileNotFoundError: Cannot find history.json file.
         """
-        self.restart_engine()
+        moves: list[str] = [move] if isinstance(move, str) else list(move)
+        with self.lock:
+            # played on a copy first, so an illegal move leaves everything as it was
+            board: Board = self.board.copy()
+            played: list[tuple[str, str]] = []
+            for item in moves:
+                if not board.is_legal(item):
+                    raise ValueError(f'Cannot make move: {item}')
+                board.push(item)
+                played.append((item, board.fen()))
+            self.board = board
+            # remove the other multi-universe your created
+            self.line = self.line[:self.ply] + played
+            self.ply = len(self.line)
 
-        self.engine.make_moves_from_current_position(move)
+            # Stockfish gets it once started
+            if self.ready.is_set():
+                self.restart_engine()
+                self._send_position()
         self.current_move += 1
+        if not self.history:
+            return
         try:
             with open(PROJECT_PATH / 'history.json', mode="r", encoding="utf-8") as read_file:
                 existed_data: dict = json.load(read_file)
@@ -244,5 +1383,262 @@ class Engine:
             json.dump(existed_data, write_file, indent=4)
             write_file.close()
 
+def physical_cores() -> list[list[int]]:
+    """
+    Group the logical CPUs this process may use by physical core (hyperthreads together). \
+Every logical CPU is its own core when the topology can not be read (eg: not Linux).
+
+    Returns:
+        list[list[int]]: the logical CPUs of every physical core.
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        cpus: list[int] = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count() or 1))
+
+    cores: dict = {} # (package, core): logical CPUs
+    for cpu in cpus:
+        topology: str = f'/sys/devices/system/cpu/cpu{cpu}/topology'
+        try:
+            with open(f'{topology}/physical_package_id', mode='r', encoding='utf-8') as read_file:
+                package: str = read_file.read().strip()
+            with open(f'{topology}/core_id', mode='r', encoding='utf-8') as read_file:
+                core: str = read_file.read().strip()
+        except OSError:
+            package, core = '', str(cpu)
+        cores.setdefault((package, core), []).append(cpu)
+    return list(cores.values())
+
+def assign_cores(workers: int, threads: int,
+                 policy: str = 'shared') -> list[tuple[set[int] | None, int]]:
+    """
+    Decide the CPUs and the `Threads` of every worker.
+
+    Args:
+        workers (int): the number of workers.
+        threads (int): the `Threads` budget of all workers together.
+        policy (str, optional): `shared`: every worker may run anywhere, the budget is split. \
+`dedicated`: every worker gets its own physical cores (one thread each, hyperthreads left \
+idle), or one logical CPU when there are more workers than physical cores (a core of its \
+own first, hyperthreads of the others once the cores run out). Defaults to 'shared'.
+
+    Raises:
+        ValueError: an unknown policy.
+
+    Returns:
+        list[tuple[set[int] | None, int]]: the CPUs (None for anywhere) and the `Threads` \
+of every worker.
+    """
+    if policy == 'shared':
+        return [(None, count) for count in split_threads(threads, workers)]
+    if policy != 'dedicated':
+        raise ValueError(f'Unknown core policy: {policy} (shared or dedicated)')
+
+    cores: list[list[int]] = physical_cores()
+    if workers > len(cores):
+        # one logical CPU each, on every core first, then on their hyperthreads
+        cpus: list[int] = [siblings[index] for index in range(max(map(len, cores)))
+                           for siblings in cores if index < len(siblings)]
+        # more workers than logical CPUs share them in turn
+        return [({cpus[index % len(cpus)]}, 1) for index in range(workers)]
+
+    cpus = [siblings[0] for siblings in cores][:max(workers, min(threads, len(cores)))]
+    assigned: list[tuple[set[int] | None, int]] = []
+    start: int = 0
+    for count in split_threads(len(cpus), workers):
+        assigned.append((set(cpus[start:start + count]), count))
+        start += count
+    return assigned
+
+def split_threads(threads: int, workers: int) -> list[int]:
+    """
+    Split a `Threads` (or `Hash`) budget across workers.
+
+    Args:
+        threads (int): the total number of threads (or MB).
+        workers (int): the number of workers.
+
+    Returns:
+        list[int]: threads (or MB) of each worker (at least 1 each).
+    """
+    share, extra = divmod(max(threads, workers), workers)
+    return [share + 1 if index < extra else share for index in range(workers)]
+
+class EnginePool:
+    """
+    A pool of Stockfish workers, so many positions can be analysed at the same time.
+
+    Args:
+        data (dict): the setting data (same as `Engine`), its `Hash` is the budget of the \
+whole pool, split across workers (at least 1 MB each).
+        workers (int | None, optional): number of Stockfish processes. Defaults to one per thread.
+        threads (int | None, optional): the `Threads` budget split across workers. \
+Defaults to the number of CPU cores.
+        affinity (str, optional): how workers share the CPUs (see `assign_cores()`), \
+`dedicated` pins them on Linux. Defaults to 'shared'.
+    """
+    def __init__(self, data: dict, workers: int | None = None, threads: int | None = None,
+                 affinity: str = 'shared'):
+        self.data = data
+
+        self.threads: int = threads or os.cpu_count() or 1
+        self.size: int = workers or self.threads
+        # (CPUs or None, Threads) of every worker
+        self.cores: list[tuple[set[int] | None, int]] = assign_cores(self.size, self.threads,
+                                                                     affinity)
+        # MB of every worker, so the pool takes no more memory than one engine would
+        self.worker_hash: list[int] = split_threads(int(self.data['Stockfish'].get('Hash', 16)),
+                                                    self.size)
+
+        # every worker's client runs on the same event loop, these are their blocking facades
+        self.workers: list[UCIEngine] = [self._spawn(index) for index in range(self.size)]
+        self.restarts: int = 0
+
+        # optional, read by every thread (mmap needs no lock for that)
+        book_path: str = self.data['ChessAI'].get('Opening Book', '')
+        self.book: OpeningBook | None = OpeningBook(book_path) if book_path else None
+
+        self._idle: queue.Queue = queue.Queue()
+        for index in range(self.size):
+            self._idle.put(index)
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='EnginePool')
+
+    def _spawn(self, index: int) -> UCIEngine:
+        """Start the Stockfish of one worker, pinned to its CPUs if it has some."""
+        cpus, threads = self.cores[index]
+        parameters: dict = dict(self.data['Stockfish'])
+        parameters['Threads'] = threads
+        parameters['Hash'] = self.worker_hash[index]
+        worker = UCIEngine(path=self.data['ChessAI']['Engine'],
+                           parameters=parameters, print_command=False)
+        if cpus is not None:
+            worker.set_affinity(cpus)
+        return worker
+
+    def _run(self, func, args: tuple, kwargs: dict):
+        """Borrow an idle worker for the job."""
+        index: int = self._idle.get()
+        try:
+            return func(self.workers[index], *args, **kwargs)
+        finally:
+            try:
+                # only the crashed worker is replaced, others keep their hash
+                if self.workers[index].crashed:
+                    self.workers[index] = self._spawn(index)
+                    self.restarts += 1
+            except (OSError, TimeoutError, StockfishException) as err:
+                # the next job on this worker fails (and tries again) instead of waiting forever
+                print(f'{err}\nCannot restart a pool worker')
+            finally:
+                self._idle.put(index)
+
+    def submit(self, func, *args, **kwargs) -> Future:
+        """
+        Run `func(worker, *args, **kwargs)` on the next idle worker.
+
+        Args:
+            func (Callable): the job, its first argument is the worker's `UCIEngine`.
+
+        Returns:
+            Future: the result of the job.
+        """
+        return self._executor.submit(self._run, func, args, kwargs)
+
+    def evaluate(self, fen: str) -> Future:
+        """
+        Get the evaluation of a position.
+
+        Args:
+            fen (str): the FEN.
+
+        Returns:
+            Future: resolves to the evaluation (same as `Engine.get_stats()`).
+        """
+        def job(worker: UCIEngine) -> dict:
+            analysis: dict = self._search(worker, fen, 1, go_command(depth=worker.depth))
+            return {'type': analysis['type'], 'value': analysis['value']} if analysis else {}
+        return self.submit(job)
+
+    def top_moves(self, fen: str, num_top_moves: int = 2) -> Future:
+        """
+        Get the best moves of a position.
+
+        Args:
+            fen (str): the FEN.
+            num_top_moves (int, optional): how many moves. Defaults to 2.
+
+        Returns:
+            Future: resolves to tuple[str] of best moves.
+        """
+        def job(worker: UCIEngine) -> tuple[str]:
+            analysis: dict = self._search(worker, fen, num_top_moves,
+                                          go_command(depth=worker.depth))
+            return tuple(move['Move'] for move in analysis.get('moves', []))
+        return self.submit(job)
+
+    @staticmethod
+    def _search(worker: UCIEngine, fen: str, multipv: int, command: str) -> dict:
+        """Search a position on a worker, empty if there is no legal move."""
+        # positions are not from one game, but the hash may still help
+        worker.put(f'position fen {fen}')
+        worker.set_option('MultiPV', multipv)
+
+        lines: dict = {}
+        last: dict = {}
+        for info in worker.search(command):
+            if info['pv']:
+                lines[info['multipv']] = info
+                last = info
+        return summarize(lines, last, 1 if fen.split()[1] == 'w' else -1) if lines else {}
+
+    def analyse(self, fen: str, multipv: int = 1, depth: int | None = None,
+                movetime: int | None = None, nodes: int | None = None,
+                book: bool = True) -> Future:
+        """
+        Search a position under a limit. With no limit, the workers' depth is used. In the \
+opening book, the book moves are given right away instead.
+
+        Args:
+            fen (str): the FEN.
+            multipv (int, optional): how many best moves. Defaults to 1.
+            depth (int | None, optional): plies. Defaults to None.
+            movetime (int | None, optional): milliseconds. Defaults to None.
+            nodes (int | None, optional): nodes. Defaults to None.
+            book (bool, optional): use the opening book, else always search (eg: to get an \
+evaluation). Defaults to True.
+
+        Returns:
+            Future: resolves to the analysis (same as `Engine.analyse()`), empty if there \
+is no legal move.
+        """
+        if book and self.book is not None:
+            booked: dict = self.book.analysis(
+                Board(fen, chess960=self.data['Stockfish']['UCI_Chess960']), multipv)
+            if booked:
+                future: Future = Future()
+                future.set_result(booked)
+                return future
+
+        def job(worker: UCIEngine) -> dict:
+            if depth is None and movetime is None and nodes is None:
+                return self._search(worker, fen, multipv, go_command(depth=worker.depth))
+            return self._search(worker, fen, multipv, go_command(depth, movetime, nodes))
+        return self.submit(job)
+
+    def close(self) -> None:
+        """Wait for the running jobs, then quit every worker."""
+        self._executor.shutdown(wait=True)
+        for worker in self.workers:
+            worker.quit()
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+
+    def __enter__(self) -> 'EnginePool':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
 if __name__ == '__main__':
     pass
@@ -2,22 +2,30 @@
 
 import os
 import json
+import queue
+import threading
+import time
 
 import tkinter as tk
 from tkinter import ttk
 import pygubu
 from PIL import Image, ImageTk
+from stockfish import StockfishException
 
 from .sub_gui.gui_base import PROJECT_PATH, ALPHABET_DICT, FEN_DICT
 from .sub_gui.gui_setting import ChessAISetting
 
 from .engine import Engine
+from .review import MARKS, review_game
 
 PROJECT_UI: str = os.path.join(PROJECT_PATH, 'sub_gui', 'ChessAI.ui')
 
 NUMBER_DICT: dict = {k: v for v, k in ALPHABET_DICT.items()}
 BOARD_DICT: dict = {k[:-4]: v for v, k in FEN_DICT.items()}
 
+# least seconds between two shown analyses, the info stream is much faster than that
+REFRESH_INTERVAL: float = 0.25
+
 class ChessAIApp(ChessAISetting): # inherit
     """
     An app that using pygubu.
@@ -28,7 +36,18 @@ class ChessAIApp(ChessAISetting): # inherit
         super().__init__()
         self.pieces_selected: str = "empty"
 
-        self.engine = Engine(data=data)
+        # analysis runs on a thread, results come back through this queue
+        self.analysis_queue: queue.Queue = queue.Queue()
+        self.analysis_thread: threading.Thread | None = None
+        self.analysis_polling: bool = False
+        self.pending_analysis: tuple | None = None # (search id, analysis) for `REFRESH_INTERVAL`
+        self.last_refresh: float = 0.0
+        # the game review runs next to the analysis, on its own Stockfish processes
+        self.review_thread: threading.Thread | None = None
+        self.reviewed: dict = {} # `root`, `moves` and `plies` (ply: review) of the last review
+
+        # Stockfish starts in the background, the window does not wait for it
+        self.engine = Engine(data=data, background=True)
 
         self.builder = builder = pygubu.Builder()
         builder.add_resource_path(PROJECT_PATH)
@@ -58,8 +77,11 @@ class ChessAIApp(ChessAISetting): # inherit
         self.prepare_chessboard()
         self.prepare_hover()
 
-        self.engine.set_elo(self.engine.data['ChessAI']['Elo'])
         self.builder.tkvariables['engine_elo'].set(self.engine.data['ChessAI']['Elo'])
+        self.builder.get_object('stat_type').config(text='...')
+        self.builder.get_object('stat_value').config(text='starting engine')
+        self.start_worker(self.startup_worker, self.engine.search_id,
+                          self.engine.data['ChessAI']['Elo'])
 
         self.vision__init__()
         self.setting__init__()
@@ -69,9 +91,10 @@ class ChessAIApp(ChessAISetting): # inherit
         self.mainwindow.mainloop()
 
     def set_fen(self) -> None:
-        """Set the fen."""
-        self.engine.restart_engine()
-        self.engine.engine.set_fen_position(self.fen)
+        """Set the fen. The running analysis is about the old position, so stop it."""
+        self.engine.stop()
+        self.engine.set_fen(self.fen)
+        self.infinite_restart()
 
     def warning(self, message: str) -> None:
         """Show warning."""
@@ -149,6 +172,8 @@ class ChessAIApp(ChessAISetting): # inherit
             self.fen = self.board_to_fen(self.board)
             if self.white_king_exist == 1 and self.black_king_exist == 1:
                 self.set_fen()
+            else:
+                self.engine.stop() # nothing to analyse until there are 2 kings
 
             self.reset_moves()
             self.show_moves()
@@ -194,6 +219,11 @@ class ChessAIApp(ChessAISetting): # inherit
         sliced_fen[2] = castle
         self.fen = ' '.join(sliced_fen)
 
+        # the infinite analysis always runs on what is shown
+        if self.builder.tkvariables['analyse_infinite'].get()\
+                and self.white_king_exist == 1 and self.black_king_exist == 1:
+            self.set_fen()
+
     def fen_flip(self, _: object) -> None:
         """Edit the flip the side in the app."""
         chessboard: str = ''
@@ -243,36 +273,231 @@ class ChessAIApp(ChessAISetting): # inherit
         self.fen = ' '.join(sliced_fen)
         self.set_fen()
 
-    def fen_analyse(self, _: object) -> None:
-        """Analyse and give top moves."""
+    def fen_analyse(self, _: object, adaptive: bool = False) -> None:
+        """Analyse and give top moves. `adaptive` (for "Analyse Every Move") may stop early."""
         if self.white_king_exist != 1 or self.black_king_exist != 1:
             self.warning(f'There must be 1 king each side. (There are \
 {self.white_king_exist} white king(s) and {self.black_king_exist} black king(s))')
             return
 
+        if not self.engine.check_valid(self.fen):
+            self.warning('This position is not valid. (Check the castling rights, \
+pawns on the last ranks and which side is in check)')
+            return
+
         self.set_fen()
-        self.update_stats()
         self.update_moves()
 
-        engine_top = self.engine.get_top_moves()
-        engine_top1 = engine_top[0]
-        try:
-            engine_top2 = engine_top[1]
-        except IndexError:
-            engine_top2 = ''
-
-        self.builder.tkvariables['var_top1'].set(engine_top1)
-        self.builder.tkvariables['var_top2'].set(engine_top2)
-
-        engine_elo = int(self.builder.get_variable('engine_elo').get())
-        self.engine.set_elo(engine_elo)
-
         if self.move is not None:
             self.builder.get_object('chessboard').delete(self.move)
             self.move = None
         self.builder.get_object('top1').config(relief='flat', background='')
         self.builder.get_object('top2').config(relief='flat', background='')
 
+        # `set_fen()` already restarted the infinite analysis
+        if self.builder.tkvariables['analyse_infinite'].get():
+            return
+
+        # `set_fen()` already stopped the last analysis
+        engine_elo = int(self.builder.get_variable('engine_elo').get())
+        self.start_worker(self.analyse_worker, self.engine.search_id, engine_elo,
+                          self.engine.search_limits(adaptive))
+
+    def fen_infinite(self) -> None:
+        """Turn the infinite analysis on (it starts right away) or off."""
+        if self.builder.tkvariables['analyse_infinite'].get():
+            self.fen_analyse(object)
+        else:
+            self.engine.stop()
+
+    def infinite_restart(self) -> None:
+        """Run the infinite analysis on the current position again, if it is on."""
+        if not self.builder.tkvariables['analyse_infinite'].get():
+            return
+
+        # an invalid position would crash Stockfish, wait for the next edit
+        self.engine.stop()
+        if self.white_king_exist != 1 or self.black_king_exist != 1\
+                or not self.engine.check_valid(self.fen):
+            return
+
+        engine_elo = int(self.builder.get_variable('engine_elo').get())
+        self.start_worker(self.infinite_worker, self.engine.search_id, engine_elo)
+
+    def fen_review(self, _: object) -> None:
+        """Review every move of the game so far (undone ones included) on several Stockfish."""
+        if self.review_thread is not None and self.review_thread.is_alive():
+            return
+
+        root, moves = self.engine.game()
+        if not moves:
+            self.warning('There is no move to review yet. (Move the pieces on the chessboard)')
+            return
+
+        limits: dict = self.engine.search_limits()
+        limits.pop('stable')
+        self.reviewed = {'root': root, 'moves': moves, 'plies': {}}
+        self.builder.get_object('review').config(text=f'0/{len(moves)}')
+
+        self.review_thread = threading.Thread(target=self.review_worker,
+                                              args=(root, moves, limits), daemon=True)
+        self.review_thread.start()
+        if not self.analysis_polling:
+            self.analysis_polling = True
+            self.mainwindow.after(50, self.analyse_poll)
+
+    def start_worker(self, target, *args) -> None:
+        """Run `target(*args)` on the analysis thread and poll what it sends."""
+        self.analysis_thread = threading.Thread(target=target, args=args, daemon=True)
+        self.analysis_thread.start()
+        if not self.analysis_polling:
+            self.analysis_polling = True
+            self.mainwindow.after(50, self.analyse_poll)
+
+    def startup_worker(self, search_id: int, engine_elo: int) -> None:
+        """Wait for Stockfish to start, then get the first evaluation and set the elo."""
+        try:
+            self.engine.wait_ready()
+        except (OSError, TimeoutError, StockfishException) as err:
+            self.analysis_queue.put((search_id, 'started', str(err)))
+            return
+        self.analysis_queue.put((search_id, 'started', None))
+
+        try:
+            self.analysis_queue.put((search_id, 'stats', self.engine.get_stats(
+                None, search_id, **self.engine.search_limits())))
+            self.engine.set_elo(engine_elo)
+        except Exception as err: # Stockfish crashed, it restarts on the next call
+            print(f'{err}\nAnalyse error')
+
+    def analyse_worker(self, search_id: int, engine_elo: int, limits: dict) -> None:
+        """Analyse on a thread. Never touch tkinter here, send to `analysis_queue` instead."""
+        def send(kind: str):
+            return lambda value: self.analysis_queue.put((search_id, kind, value))
+
+        try:
+            # one search gives both the evaluation and the top moves
+            analysis: dict = self.engine.analyse(None, 2, send('analysis'), search_id, **limits)
+            send('analysis')(analysis)
+            self.engine.set_elo(engine_elo)
+
+            # idle until the next request, so the likely next positions are searched meanwhile
+            top: int = int(self.engine.data['ChessAI'].get('Speculative Moves', 0))
+            if top and analysis:
+                limits = self.engine.search_limits()
+                limits.pop('stable')
+                self.engine.speculate([move['Move'] for move in analysis['moves'][:top]],
+                                      2, search_id, **limits)
+        except Exception as err: # Stockfish crashed, it restarts on the next call
+            print(f'{err}\nAnalyse error')
+
+    def review_worker(self, root: str, moves: list[str], limits: dict) -> None:
+        """Review a game on a thread, sending every ply as soon as it is done."""
+        def send(review: dict) -> None:
+            self.analysis_queue.put((None, 'review', review))
+
+        try:
+            review_game(self.engine.data, root, moves, on_ply=send, **limits)
+        except Exception as err: # Stockfish crashed or could not start
+            self.analysis_queue.put((None, 'reviewed', str(err)))
+            return
+        self.analysis_queue.put((None, 'reviewed', None))
+
+    def infinite_worker(self, search_id: int, engine_elo: int) -> None:
+        """Analyse with `go infinite` until `Engine.stop()`, sending every update."""
+        def send(value: dict) -> None:
+            self.analysis_queue.put((search_id, 'analysis', value))
+
+        try:
+            # the search never ends by itself, so the elo is set first
+            self.engine.set_elo(engine_elo)
+            self.engine.analyse(None, 2, send, search_id, infinite=True)
+        except Exception as err: # Stockfish crashed, it restarts on the next call
+            print(f'{err}\nAnalyse error')
+
+    def analyse_poll(self) -> None:
+        """Show what the analysis thread found so far."""
+        while True:
+            try:
+                search_id, kind, value = self.analysis_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            # the "starting engine" text is replaced even if the position changed meanwhile
+            if kind == 'started':
+                self.show_started(value)
+                continue
+            # the review is about its own game, not the position on the board
+            if kind == 'review':
+                self.reviewed['plies'][value['ply']] = value
+                self.builder.get_object('review').config(
+                    text=f"{len(self.reviewed['plies'])}/{len(self.reviewed['moves'])}")
+                if value['ply'] == self.engine.ply - 1:
+                    self.show_review()
+                continue
+            if kind == 'reviewed':
+                self.builder.get_object('review').config(text='Review')
+                if value is not None:
+                    self.warning(f'Cannot review the game. ({value})')
+                continue
+
+            # from an analysis that has been stopped
+            if search_id != self.engine.search_id:
+                continue
+
+            if kind == 'analysis' and value:
+                self.pending_analysis = (search_id, value) # only the latest one is shown
+            elif kind == 'stats':
+                self.show_stats(value)
+
+        alive: bool = self.analysis_thread is not None and self.analysis_thread.is_alive()
+        alive = alive or self.review_thread is not None and self.review_thread.is_alive()
+        if self.pending_analysis is not None\
+                and (not alive or time.monotonic() - self.last_refresh >= REFRESH_INTERVAL):
+            if self.pending_analysis[0] == self.engine.search_id:
+                self.show_analysis(self.pending_analysis[1])
+            self.pending_analysis = None
+            self.last_refresh = time.monotonic()
+
+        if alive:
+            self.mainwindow.after(50, self.analyse_poll)
+        else:
+            self.analysis_polling = False
+
+    def show_started(self, error: str | None) -> None:
+        """Stockfish has started (or failed to, with the `error`)."""
+        self.builder.get_object('stat_type').config(text='')
+        self.builder.get_object('stat_value').config(text='')
+        if error is not None:
+            self.warning(f'Cannot start Stockfish. ({error})')
+
+    def show_analysis(self, analysis: dict) -> None:
+        """Show the evaluation and the top moves of `Engine.analyse()`."""
+        self.show_stats(analysis)
+        moves: list[dict] = analysis['moves']
+        self.builder.tkvariables['var_top1'].set(moves[0]['Move'] if moves else '')
+        self.builder.tkvariables['var_top2'].set(moves[1]['Move'] if len(moves) > 1 else '')
+
+    def show_cached(self) -> None:
+        """Show the analysis of the position if it is known already (eg: speculated)."""
+        analysis: dict = self.engine.peek()
+        if analysis:
+            self.show_analysis(analysis)
+
+    def show_review(self) -> None:
+        """Show the evaluation after the last move and how good it was, if it was reviewed."""
+        ply: int = self.engine.ply
+        root, moves = self.engine.game()
+        review: dict | None = self.reviewed.get('plies', {}).get(ply - 1)
+        if review is None or root != self.reviewed['root']\
+                or moves[:ply] != self.reviewed['moves'][:ply]:
+            return
+
+        self.show_stats(review['eval'])
+        if review['judgement'] is not None:
+            widget = self.builder.get_object('stat_value')
+            widget.config(text=widget.cget('text') + MARKS[review['judgement']])
+
     def fen_top1(self, event: object) -> None:
         """Edit the top 1 in the app."""
         widget = event.widget
@@ -363,6 +588,7 @@ class ChessAIApp(ChessAISetting): # inherit
         self.fen = data[str(self.engine.current_move)]['fen']
         self.set_fen()
         self.update_chessboard()
+        self.show_review()
 
         sliced_fen: tuple[str] = self.fen.split(' ')
 
@@ -405,6 +631,7 @@ class ChessAIApp(ChessAISetting): # inherit
         self.fen = data[str(self.engine.current_move)]['fen']
         self.set_fen()
         self.update_chessboard()
+        self.show_review()
 
         sliced_fen: tuple[str] = self.fen.split(' ')
 
@@ -1,15 +1,143 @@
 """Main code of ChessAI."""
 
+import argparse
 import json
 import sys
 import pathlib
 
 from stockfish.models import StockfishException
 
-from .gui import ChessAIApp
+from .batch import analyse_file
+from .bench import bench_epd, tune_settings
 
 PROJECT_PATH: str = pathlib.Path(__file__).parent
 
+def parse_args(args: list[str] | None = None) -> argparse.Namespace:
+    """
+    Read the command line. Without a command, the GUI is run.
+
+    Args:
+        args (list[str] | None, optional): the arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        argparse.Namespace: the arguments.
+    """
+    parser = argparse.ArgumentParser(prog='chessai', description='A sub-window GUI for Stockfish.')
+    commands = parser.add_subparsers(dest='command')
+
+    analyse = commands.add_parser('analyse', help='analyse a PGN, EPD or FEN file without the GUI, \
+one JSON line per position')
+    analyse.add_argument('input', help='the file, - for stdin')
+    analyse.add_argument('-o', '--output', help='the JSONL file. Defaults to stdout')
+    analyse.add_argument('--format', default='auto', choices=('auto', 'pgn', 'epd', 'fen'),
+                         help='the input format. Defaults to the file suffix')
+    analyse.add_argument('--engine', help='path to Stockfish. Defaults to setting.json')
+    analyse.add_argument('--workers', type=int, help='Stockfish processes. Defaults to one per \
+thread')
+    analyse.add_argument('--threads', type=int, help='threads of all workers together. Defaults \
+to the number of CPU cores')
+    analyse.add_argument('--affinity', default='shared', choices=('shared', 'dedicated'),
+                         help='dedicated: pin every worker to its own physical cores (Linux), \
+its Threads matching them. Defaults to shared')
+    analyse.add_argument('--multipv', type=int, default=1, help='best moves per position')
+    analyse.add_argument('--depth', type=int, help='plies per position')
+    analyse.add_argument('--movetime', type=int, help='milliseconds per position')
+    analyse.add_argument('--nodes', type=int, help='nodes per position')
+    analyse.add_argument('--book', help='a Polyglot opening book (.bin), book positions are \
+not searched. Defaults to setting.json')
+
+    bench = commands.add_parser('bench-epd', help='run an EPD test suite (bm/am) with the \
+settings of setting.json, and compare with an earlier run')
+    bench.add_argument('suite', help='the EPD file')
+    bench.add_argument('-o', '--output', help='write the result to this JSON file')
+    bench.add_argument('--compare', help='an earlier JSON result, exit with 1 on a regression')
+    bench.add_argument('--engine', help='path to Stockfish. Defaults to setting.json')
+    bench.add_argument('--threads', type=int, help='Threads. Defaults to setting.json')
+    bench.add_argument('--hash', type=int, help='Hash in MB. Defaults to setting.json')
+    bench.add_argument('--elo', type=int, help='Elo. Defaults to setting.json')
+    bench.add_argument('--depth', type=int, help='plies per position')
+    bench.add_argument('--movetime', type=int, help='milliseconds per position')
+    bench.add_argument('--nodes', type=int, help='nodes per position')
+
+    tune = commands.add_parser('tune', help='find the fastest Threads and Hash on this machine, \
+and write them to setting.json')
+    tune.add_argument('--budget', type=float, default=120.0, help='seconds for the whole run. \
+Defaults to 120')
+    tune.add_argument('-o', '--output', help='write the measurements to this JSON file')
+    tune.add_argument('--engine', help='path to Stockfish. Defaults to setting.json')
+    tune.add_argument('--dry-run', action='store_true', help='do not write setting.json')
+
+    return parser.parse_args(args)
+
+def set_engine_path(data: dict, args: argparse.Namespace) -> None:
+    """
+    Use `--engine` if given.
+
+    Raises:
+        StockfishException: no Stockfish path in setting.json nor `--engine`.
+    """
+    if args.engine:
+        data['ChessAI']['Engine'] = args.engine
+    if data['ChessAI']['Engine'] == '':
+        raise StockfishException('You did not add the Stockfish path yet. (Use --engine)')
+
+def run_analyse(data: dict, args: argparse.Namespace) -> None:
+    """Run the `analyse` command."""
+    set_engine_path(data, args)
+    if args.book:
+        data['ChessAI']['Opening Book'] = args.book
+
+    output = sys.stdout
+    if args.output:
+        output = open(args.output, mode='w', encoding='utf-8')
+    try:
+        done: int = analyse_file(data, args.input, output, args.format, args.workers,
+                                 args.threads, args.multipv, args.depth, args.movetime, args.nodes,
+                                 args.affinity)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f'Analysed {done} positions.', file=sys.stderr)
+
+def run_bench(data: dict, args: argparse.Namespace) -> bool:
+    """
+    Run the `bench-epd` command.
+
+    Returns:
+        bool: True if there is no regression.
+    """
+    set_engine_path(data, args)
+    if args.threads:
+        data['Stockfish']['Threads'] = args.threads
+    if args.hash:
+        data['Stockfish']['Hash'] = args.hash
+    if args.elo:
+        data['ChessAI']['Elo'] = args.elo
+
+    return bench_epd(data, args.suite, args.output, args.compare,
+                     args.depth, args.movetime, args.nodes)
+
+def run_tune(data: dict, args: argparse.Namespace, path: str) -> None:
+    """Run the `tune` command, only Threads and Hash are saved (not `--engine`)."""
+    saved: dict = json.loads(json.dumps(data))
+    set_engine_path(data, args)
+    best: dict = tune_settings(data, args.budget, args.output)
+    if args.dry_run:
+        return
+
+    # read again, it may have been changed (eg: by the GUI) while tuning
+    try:
+        with open(path, mode="r", encoding="utf-8") as read_file:
+            saved = json.load(read_file)
+            read_file.close()
+    except FileNotFoundError:
+        pass
+    saved['Stockfish'].update(best)
+    with open(path, mode="w", encoding="utf-8") as write_file:
+        json.dump(saved, write_file, indent=4)
+        write_file.close()
+    print(f'Saved to {path}.')
+
 def main():
     """
     Run the main code.
@@ -17,6 +145,8 @@ def main():
     Raises:
         StockfishException: user did not add stockfish path yet.
     """
+    args = parse_args()
+
     if getattr(sys, "frozen", False):
         # If the 'frozen' flag is set, we are in bundled-app mode.
         path = 'setting.json'
@@ -37,6 +167,16 @@ def main():
                 "Analyse Every Move": False,
                 "Elo": 1350,
                 "Current Template": "",
+                "Analysis Store": "",
+                "Opening Book": "",
+                "Hot Spare": False,
+                "Speculative Moves": 0,
+                "Review Workers": 4,
+                "Depth": 15,
+                "Movetime": 0,
+                "Nodes": 0,
+                "Stable Depths": 4,
+                "Max Time": 3000,
             },
             "Stockfish": {
                 "Debug Log File": "",
@@ -47,6 +187,15 @@ def main():
             },
         }
 
+    if args.command == 'analyse':
+        run_analyse(data, args)
+        return
+    if args.command == 'bench-epd':
+        sys.exit(0 if run_bench(data, args) else 1)
+    if args.command == 'tune':
+        run_tune(data, args, path)
+        return
+
     if data['ChessAI']['Engine'] == '':
         stockfish_path = input('Please paste in path to stockfish:\n>> ')
         if stockfish_path == '':
@@ -58,6 +207,9 @@ def main():
             json.dump(data, write_file, indent=4)
             write_file.close()
 
+    # only here, `analyse`, `bench-epd` and `tune` run on servers without tkinter
+    from .gui import ChessAIApp
+
     app = ChessAIApp(data)
     app.run()
 
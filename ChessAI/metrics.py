@@ -0,0 +1,115 @@
+"""The metrics of ChessAI, to see where the time goes when talking to Stockfish."""
+
+from bisect import bisect_left
+
+# upper bounds (seconds) of the latency histogram buckets, the last bucket has no bound
+LATENCY_BUCKETS: tuple[float] = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# commands with a reply, timed until the line starting with it
+REPLIES: dict = {
+    'go': 'bestmove',
+    'd': 'Checkers',
+    'isready': 'readyok',
+}
+# commands without a reply, timed while writing to the pipe
+NO_REPLIES: tuple[str] = ('position', 'setoption')
+
+class Metrics:
+    """
+    Latency histograms of UCI commands and counters of searches.
+
+    Recording only adds to plain lists and dicts (no lock), `snapshot()` does the maths.
+    """
+    def __init__(self):
+        # dummy attributes
+        self.commands: dict = {} # command: [count, total seconds, max seconds, bucket counts]
+        self.searches: int = 0
+        self.nodes: int = 0
+        self.search_time: float = 0.0
+        self.depths: dict = {} # depth: [count, total seconds to reach it]
+        self.last_search: dict = {}
+
+        self.reset()
+
+    def reset(self) -> None:
+        """Start counting from zero."""
+        self.commands = {}
+        self.searches = 0
+        self.nodes = 0
+        self.search_time = 0.0
+        self.depths = {}
+        self.last_search = {}
+
+    def command(self, name: str, seconds: float) -> None:
+        """
+        Record the latency of a command.
+
+        Args:
+            name (str): the command (eg: `go`).
+            seconds (float): from sending it to its reply.
+        """
+        entry = self.commands.get(name)
+        if entry is None:
+            entry = self.commands[name] = [0, 0.0, 0.0, [0] * (len(LATENCY_BUCKETS) + 1)]
+        entry[0] += 1
+        entry[1] += seconds
+        if seconds > entry[2]:
+            entry[2] = seconds
+        entry[3][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def search(self, last_info: dict, depth_times: dict, seconds: float) -> None:
+        """
+        Record a finished search.
+
+        Args:
+            last_info (dict): the last parsed info line (see `parse_info()`), may be empty.
+            depth_times (dict): seconds from `go` until each depth was first reached.
+            seconds (float): from `go` to `bestmove`.
+        """
+        self.searches += 1
+        self.nodes += last_info.get('nodes', 0)
+        self.search_time += seconds
+        for depth, moment in depth_times.items():
+            entry = self.depths.get(depth)
+            if entry is None:
+                entry = self.depths[depth] = [0, 0.0]
+            entry[0] += 1
+            entry[1] += moment
+
+        self.last_search = {
+            'depth': last_info.get('depth', 0),
+            'nodes': last_info.get('nodes', 0),
+            'nps': last_info.get('nps', 0),
+            'time': seconds,
+        }
+
+    def snapshot(self) -> dict:
+        """
+        Get the metrics so far.
+
+        Returns:
+            dict: `commands` (count, mean and max in ms, and `histogram` of counts by bucket), \
+`searches`, `nodes`, `nps` (over every search), `time_to_depth` (mean seconds) and \
+`last_search`.
+        """
+        bounds: list[str] = [f'<={bound * 1000:g}ms' for bound in LATENCY_BUCKETS]
+        bounds.append(f'>{LATENCY_BUCKETS[-1] * 1000:g}ms')
+
+        commands: dict = {}
+        for name, (count, total, longest, buckets) in list(self.commands.items()):
+            commands[name] = {
+                'count': count,
+                'mean_ms': total / count * 1000 if count else 0.0,
+                'max_ms': longest * 1000,
+                'histogram': dict(zip(bounds, buckets)),
+            }
+
+        return {
+            'commands': commands,
+            'searches': self.searches,
+            'nodes': self.nodes,
+            'nps': int(self.nodes / self.search_time) if self.search_time else 0,
+            'time_to_depth': {depth: total / count
+                              for depth, (count, total) in sorted(self.depths.items())},
+            'last_search': dict(self.last_search),
+        }
@@ -0,0 +1,121 @@
+"""The PGN reader of ChessAI, streams games from files of any size."""
+
+import mmap
+import os
+import re
+
+from .board import STARTING_FEN, Board
+
+# bytes read at a time from file objects
+CHUNK_SIZE: int = 1 << 20
+
+# [Name "Value"]
+HEADER_REGEX = re.compile(r'^\[(\w+)\s+"(.*)"\]\s*$')
+# comments, NAGs, move numbers and results are skipped, only variations and moves are caught
+TOKEN_REGEX = re.compile(
+    r'\{[^}]*\}|;[^\n]*|\$\d+|\d+\.+|1-0|0-1|1/2-1/2|\*|([()])|([^\s(){};$.]+)')
+
+def _read_lines(source, chunk_size: int = CHUNK_SIZE):
+    """Yield the lines (bytes) of a path (through mmap) or of a file object (by chunks)."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, mode='rb') as file:
+            try:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError: # empty file
+                return
+            with mapped:
+                yield from iter(mapped.readline, b'')
+        return
+
+    rest: bytes = b''
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        lines: list[bytes] = (rest + chunk).split(b'\n')
+        rest = lines.pop()
+        yield from lines
+    if rest:
+        yield rest
+
+def san_moves(movetext: str):
+    """
+    Yield the SAN moves of the main line, variations and comments are skipped.
+
+    Args:
+        movetext (str): the moves of a game (eg: `1. e4 {best by test} e5 (1... c5) 2. Nf3`).
+    """
+    depth: int = 0 # inside how many variations
+    for parenthesis, move in TOKEN_REGEX.findall(movetext):
+        if parenthesis == '(':
+            depth += 1
+        elif parenthesis == ')':
+            depth -= 1
+        elif move and depth == 0:
+            yield move
+
+def _play(headers: dict, movetext: list[bytes], strict: bool):
+    """Yield the positions of one game."""
+    board = Board(headers.get('FEN', STARTING_FEN), chess960='960' in headers.get('Variant', ''))
+    # by lines, a `;` comment ends with its line
+    text: str = b'\n'.join(movetext).decode('utf-8', errors='replace')
+    for ply, san in enumerate(san_moves(text)):
+        try:
+            move = board.parse_san(san)
+        except ValueError as err:
+            if strict:
+                raise ValueError(f'{err} (ply {ply} of {headers})') from err
+            return
+        yield headers, ply, board.fen(), move
+        board.push(move)
+
+def read_pgn(source, header_filter=None, strict: bool = True, chunk_size: int = CHUNK_SIZE):
+    """
+    Yield every position of every game, one game in memory at a time.
+
+    Args:
+        source (str | PathLike | IO): a path (read through mmap) or an opened file (read by \
+`chunk_size`).
+        header_filter (Callable | None, optional): called with the headers of each game, \
+games it returns False for are skipped without reading their moves. Defaults to None.
+        strict (bool, optional): raise on an illegal move, else skip the rest of that game. \
+Defaults to True.
+        chunk_size (int, optional): bytes read at a time from a file. Defaults to `CHUNK_SIZE`.
+
+    Raises:
+        ValueError: a move is not legal (only if `strict`).
+
+    Yields:
+        tuple[dict, int, str, str]: the game's headers, the ply (from 0), the FEN before \
+the move and the move (eg: e2e4).
+    """
+    headers: dict = {}
+    movetext: list[bytes] = []
+    in_headers: bool = False
+    skipping: bool = False
+
+    for line in _read_lines(source, chunk_size):
+        first: bytes = line[:1]
+        if first == b'[':
+            # the headers of the next game
+            if not in_headers:
+                if movetext and not skipping:
+                    yield from _play(headers, movetext, strict)
+                headers, movetext, in_headers = {}, [], True
+            match = HEADER_REGEX.match(line.decode('utf-8', errors='replace'))
+            if match is not None:
+                headers[match.group(1)] = match.group(2)
+            continue
+        if first == b'%': # escaped line
+            continue
+
+        if in_headers:
+            in_headers = False
+            skipping = header_filter is not None and not header_filter(headers)
+        if not skipping and line.strip():
+            movetext.append(line)
+
+    if movetext and not skipping:
+        yield from _play(headers, movetext, strict)
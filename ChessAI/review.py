@@ -0,0 +1,158 @@
+"""The game review of ChessAI, judges every move of a game from evaluation drops."""
+
+import math
+from concurrent.futures import Future, as_completed
+
+from .board import WHITE, Board
+from .engine import EnginePool
+
+# centipawns, Stockfish's scale, bigger leads are all "winning"
+CP_CEILING: int = 1000
+# drop in the mover's winning chances (-1 to 1), biggest first
+JUDGEMENTS: tuple[tuple[float, str]] = (
+    (0.3, 'blunder'),
+    (0.2, 'mistake'),
+    (0.1, 'inaccuracy'),
+)
+# how each judgement is written after a move
+MARKS: dict = {
+    'blunder': '??',
+    'mistake': '?',
+    'inaccuracy': '?!',
+}
+# Stockfish processes of a review, unless "Review Workers" is set
+REVIEW_WORKERS: int = 4
+
+def winning_chances(analysis: dict, board: Board) -> float:
+    """
+    Get white's winning chances of a position.
+
+    Args:
+        analysis (dict): its analysis (same as `Engine.analyse()`), empty if there is no \
+legal move.
+        board (Board): the position.
+
+    Returns:
+        float: from -1 (black wins) to 1 (white wins).
+    """
+    if not analysis:
+        # checkmate or stalemate
+        if not board.is_check():
+            return 0.0
+        return -1.0 if board.turn == WHITE else 1.0
+
+    if analysis['type'] == 'mate':
+        centipawn: int = CP_CEILING if analysis['value'] > 0 else -CP_CEILING
+    else:
+        centipawn = max(-CP_CEILING, min(CP_CEILING, analysis['value']))
+    return 2 / (1 + math.exp(-0.00368208 * centipawn)) - 1
+
+def judge(loss: float) -> str | None:
+    """
+    Judge a move from how much it dropped the mover's winning chances.
+
+    Args:
+        loss (float): the drop (see `winning_chances()`).
+
+    Returns:
+        str | None: `blunder`, `mistake`, `inaccuracy`, or None if fine.
+    """
+    for threshold, judgement in JUDGEMENTS:
+        if loss >= threshold:
+            return judgement
+    return None
+
+def review_game(data: dict, root: str, moves: list[str], workers: int | None = None,
+                threads: int | None = None, depth: int | None = None,
+                movetime: int | None = None, nodes: int | None = None,
+                on_ply=None) -> list[dict]:
+    """
+    Evaluate every position of a game at once on an `EnginePool`, and judge every move from \
+the evaluation before and after it. A game of N plies takes about N / workers searches.
+
+    Args:
+        data (dict): the setting data (same as `Engine`).
+        root (str): the FEN the game started from.
+        moves (list[str]): the moves (eg: e2e4), see `Engine.game()`.
+        workers (int | None, optional): number of Stockfish processes. Defaults to \
+`Review Workers` of the setting data, or `REVIEW_WORKERS`.
+        threads (int | None, optional): the `Threads` budget of the pool. Defaults to the \
+setting data's, at least one per worker.
+        depth (int | None, optional): plies per position. Defaults to None.
+        movetime (int | None, optional): milliseconds per position. Defaults to None.
+        nodes (int | None, optional): nodes per position. Defaults to None.
+        on_ply (Callable | None, optional): called with each ply's review as soon as both of \
+its positions are done (not in the game's order). Defaults to None.
+
+    Raises:
+        ValueError: a move is not legal.
+
+    Returns:
+        list[dict]: the review of every ply, in the game's order: `ply` (from 0), `move`, \
+`fen` (before the move), `eval` (`type` and `value` after it, for white), `best` (the best \
+move, None at game end), `loss` (in the mover's winning chances), `book` and `judgement` \
+(see `judge()`).
+    """
+    chess960: bool = data['Stockfish']['UCI_Chess960']
+    # not one process per CPU, each would take its share of the Hash and start slowly
+    workers = workers or int(data['ChessAI'].get('Review Workers', REVIEW_WORKERS))
+    threads = threads or max(workers, int(data['Stockfish'].get('Threads', 1)))
+    boards: list[Board] = [Board(root, chess960=chess960)]
+    for move in moves:
+        if not boards[-1].is_legal(move):
+            raise ValueError(f'Cannot make move: {move} (ply {len(boards) - 1})')
+        board: Board = boards[-1].copy()
+        board.push(move)
+        boards.append(board)
+
+    results: list[dict | None] = [None] * len(boards)
+    reviews: list[dict | None] = [None] * len(moves)
+
+    with EnginePool(data, workers, threads) as pool:
+        def finish(ply: int) -> None:
+            before, after = results[ply], results[ply + 1]
+            if before is None or after is None or reviews[ply] is not None:
+                return
+
+            # from the mover's side, never below 0 (the search may miss what the move finds)
+            side: int = 1 if boards[ply].turn == WHITE else -1
+            loss: float = max(0.0, side * (winning_chances(before, boards[ply])
+                                           - winning_chances(after, boards[ply + 1])))
+            booked: bool = pool.book is not None\
+                and moves[ply] in (move for move, _ in pool.book.moves(boards[ply]))
+            best: str | None = before['moves'][0]['Move'] if before else None
+
+            reviews[ply] = {
+                'ply': ply,
+                'move': moves[ply],
+                'fen': boards[ply].fen(),
+                'eval': {'type': after['type'], 'value': after['value']} if after\
+                    else {'type': 'mate', 'value': 0},
+                'best': best,
+                'loss': loss,
+                'book': booked,
+                'judgement': None if booked or moves[ply] == best else judge(loss),
+            }
+            if on_ply is not None:
+                on_ply(reviews[ply])
+
+        # every position is searched, book ones too, for their evaluation
+        running: dict = {} # future: index
+        for index, board in enumerate(boards):
+            if not board.legal_moves():
+                results[index] = {}
+                continue
+            future: Future = pool.analyse(board.fen(), 1, depth, movetime, nodes, book=False)
+            running[future] = index
+
+        for index in range(len(moves)):
+            finish(index)
+        for future in as_completed(running):
+            index = running[future]
+            results[index] = future.result()
+            if index > 0:
+                finish(index - 1)
+            if index < len(moves):
+                finish(index)
+
+    return reviews
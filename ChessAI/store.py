@@ -0,0 +1,144 @@
+"""The analysis store of ChessAI, keeps search results on disk between sessions."""
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+# days until an analysis is pruned
+MAX_AGE: int = 90
+
+class AnalysisStore:
+    """
+    SQLite store of `Engine.analyse()` results. Writes are batched on a background thread.
+
+    Args:
+        path (str): the database file.
+        max_entries (int, optional): most results kept, the oldest go first. Defaults to 1000000.
+        max_age (int, optional): days until a result is pruned. Defaults to `MAX_AGE`.
+        batch_size (int, optional): most results written in one transaction. Defaults to 256.
+    """
+    def __init__(self, path: str, max_entries: int = 1_000_000, max_age: int = MAX_AGE,
+                 batch_size: int = 256):
+        self.path: str = str(path)
+        self.max_entries: int = max_entries
+        self.max_age: int = max_age
+        self.batch_size: int = batch_size
+
+        # readers share this connection, the writer thread has its own
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('''
+            CREATE TABLE IF NOT EXISTS analyses (
+                key INTEGER NOT NULL,
+                engine TEXT NOT NULL,
+                settings TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                result TEXT NOT NULL,
+                updated REAL NOT NULL,
+                PRIMARY KEY (key, engine, settings)
+            )''')
+        self._connection.execute(
+            'CREATE INDEX IF NOT EXISTS analyses_updated ON analyses (updated)')
+        self._connection.commit()
+        self._read_lock = threading.Lock()
+
+        self._queue: queue.Queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name='AnalysisStore',
+                                        daemon=True)
+        self._writer.start()
+
+    @staticmethod
+    def _signed(key: int) -> int:
+        """SQLite integers are signed 64-bit, Zobrist keys are not."""
+        return key - (1 << 64) if key >= 1 << 63 else key
+
+    def get(self, key: int, engine: str, settings: str) -> dict | None:
+        """
+        Get a stored analysis.
+
+        Args:
+            key (int): the Zobrist hash of the position.
+            engine (str): the engine's version.
+            settings (str): the engine's parameters.
+
+        Returns:
+            dict | None: the analysis, None if not stored.
+        """
+        with self._read_lock:
+            row = self._connection.execute(
+                'SELECT result FROM analyses WHERE key = ? AND engine = ? AND settings = ?',
+                (self._signed(key), engine, settings)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put(self, key: int, engine: str, settings: str, analysis: dict) -> None:
+        """
+        Store an analysis (later, on the writer thread). A better one is never replaced (see \
+`cache.rank()`).
+
+        Args:
+            key (int): the Zobrist hash of the position.
+            engine (str): the engine's version.
+            settings (str): the engine's parameters.
+            analysis (dict): the analysis, with `depth` and `multipv`.
+        """
+        self._queue.put((self._signed(key), engine, settings, analysis['depth'],
+                         json.dumps(analysis), time.time()))
+
+    def _write_loop(self) -> None:
+        connection = sqlite3.connect(self.path)
+        batches: int = 0
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            rows: list[tuple] = [item]
+            # take whatever else is waiting, up to a batch
+            while len(rows) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None) # stop after this batch
+                    break
+                rows.append(item)
+
+            with connection:
+                connection.executemany('''
+                    INSERT INTO analyses (key, engine, settings, depth, result, updated)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (key, engine, settings) DO UPDATE SET
+                        depth = excluded.depth, result = excluded.result,
+                        updated = excluded.updated
+                    WHERE (json_extract(excluded.result, '$.stable') IS NOT 1, excluded.depth,
+                           ifnull(json_extract(excluded.result, '$.multipv'), 1))
+                        > (json_extract(analyses.result, '$.stable') IS NOT 1, analyses.depth,
+                           ifnull(json_extract(analyses.result, '$.multipv'), 1))''', rows)
+
+            batches += 1
+            if batches % 64 == 1:
+                self._prune(connection)
+        connection.close()
+
+    def _prune(self, connection: sqlite3.Connection) -> None:
+        """Remove results older than `max_age`, then the oldest above `max_entries`."""
+        with connection:
+            connection.execute('DELETE FROM analyses WHERE updated < ?',
+                               (time.time() - self.max_age * 86400,))
+            connection.execute('''
+                DELETE FROM analyses WHERE rowid IN (
+                    SELECT rowid FROM analyses ORDER BY updated DESC LIMIT -1 OFFSET ?
+                )''', (self.max_entries,))
+
+    def __len__(self) -> int:
+        with self._read_lock:
+            return self._connection.execute('SELECT COUNT(*) FROM analyses').fetchone()[0]
+
+    def close(self) -> None:
+        """Write what is waiting, then close the database."""
+        self._queue.put(None)
+        self._writer.join()
+        with self._read_lock:
+            self._connection.close()
@@ -54,7 +54,15 @@ class ChessAIBase(Movement):
         self.mainwindow = None
         self.advance_dialog = None
 
-    def fen_analyse(self, _: object):
+    def fen_analyse(self, _: object, adaptive: bool = False):
+        """Dummy function right now."""
+        return
+
+    def infinite_restart(self):
+        """Dummy function right now."""
+        return
+
+    def show_cached(self):
         """Dummy function right now."""
         return
 
@@ -81,8 +89,6 @@ class ChessAIBase(Movement):
             getattr(self, p).select()
             setattr(self, f'var_{p}', self.builder.get_variable(f'castle_{p}'))
 
-        self.update_stats()
-
     def prepare_hover(self) -> None:
         """Some tooltips."""
         Tooltip(self.K, "If white can castle king side")
@@ -93,10 +99,14 @@ class ChessAIBase(Movement):
         Tooltip(self.builder.get_object('white_side'), "Change to white's turn")
         Tooltip(self.builder.get_object('black_side'), "Change to black's turn")
         Tooltip(self.builder.get_object('stat_type'), "'cp': centipawn (already convert), \
-'mate': checkmate in")
+'mate': checkmate in,\n'book': from the opening book (how often the first move is played)")
         Tooltip(self.builder.get_object('stat_value'), "Positive for white, negative for black")
         Tooltip(self.builder.get_object('analyse'), "Analyse the chessboard")
+        Tooltip(self.builder.get_object('infinite'), "Keep analysing whatever is on the \
+chessboard\n(until turned off)")
         Tooltip(self.builder.get_object('elo'), "The elo rating")
+        Tooltip(self.builder.get_object('review'), "Review every move of the game on several \
+Stockfish at once,\n'?!': inaccuracy, '?': mistake, '??': blunder (shown with undo and redo)")
         Tooltip(self.builder.get_object('halfmove'), "Halfmove clock: The number of halfmoves \
 since the last capture\nor pawn advance, used for the fifty-move rule")
         Tooltip(self.builder.get_object('fullmove'), "Fullmove number: The number of the \
@@ -211,12 +221,19 @@ full moves. It starts at 1 and\nis incremented after Black's move")
 
     def update_stats(self) -> None:
         """Update stat to app."""
-        stat  = self.engine.get_stats()
+        self.show_stats(self.engine.get_stats())
+
+    def show_stats(self, stat: dict) -> None:
+        """Show the evaluation on the app."""
+        if not stat:
+            return
         self.builder.get_object('stat_type').config(text=stat['type'])
         final: str = str(stat['value'])
         if stat['type'] == 'cp':
             final = str(stat['value']/100)
-        if float(final) >= 0:
+        if stat['type'] == 'book':
+            final += '%'
+        elif float(final) >= 0:
             final = '+' + final
         self.builder.get_object('stat_value').config(text=final)
 
@@ -268,6 +285,7 @@ full moves. It starts at 1 and\nis incremented after Black's move")
         self.reset_moves()
         self.show_moves()
         self.move_ready = False
+        self.engine.stop()
         self.engine.move([last_move + move])
 
         self.fen = self.engine.get_fen()
@@ -296,8 +314,12 @@ full moves. It starts at 1 and\nis incremented after Black's move")
         self.builder.tkvariables['engine_fullmove'].set(sliced_fen[5])
 
         self.update_chessboard()
-        if self.engine.data['ChessAI']['Analyse Every Move']:
-            self.fen_analyse(object)
+        if self.builder.tkvariables['analyse_infinite'].get():
+            self.infinite_restart()
+        elif self.engine.data['ChessAI']['Analyse Every Move']:
+            self.fen_analyse(object, adaptive=True)
+        else:
+            self.show_cached()
 
         if self.move is not None:
             self.builder.get_object('chessboard').delete(self.move)
@@ -307,6 +329,7 @@ full moves. It starts at 1 and\nis incremented after Black's move")
 
     def on_closing(self):
         """Close the app."""
+        self.engine.close()
         if os.path.isfile(PROJECT_PATH / 'history.json'):
             os.remove(PROJECT_PATH / 'history.json')
         self.mainwindow.destroy()
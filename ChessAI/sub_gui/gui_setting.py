@@ -2,9 +2,11 @@
 
 import json
 import sys
+import threading
 
 import tkinter as tk
 
+from ..bench import tune_settings
 from .gui_base import PROJECT_PATH
 from .gui_vision import ChessAIVision
 from .tooltip import Tooltip
@@ -13,12 +15,31 @@ class ChessAISetting(ChessAIVision): #inherit
     """The setting tab for ChessAI."""
     def setting__init__(self):
         """__init__ for the Setting tab."""
+        # the tune runs for minutes, on its own Stockfish
+        self.tune_thread: threading.Thread | None = None
+        self.tune_result: dict | str | None = None # the best settings, or the error
+
         self.setting_tooltip()
         self.setting_warning()
 
         self.builder.tkvariables['Entry_ChessAI_Analyse_Every_Move']\
             .set(str(self.engine.data['ChessAI']['Analyse Every Move']))
 
+        self.builder.tkvariables['Entry_ChessAI_Depth']\
+            .set(self.engine.data['ChessAI'].get('Depth', 15))
+
+        self.builder.tkvariables['Entry_ChessAI_Movetime']\
+            .set(self.engine.data['ChessAI'].get('Movetime', 0))
+
+        self.builder.tkvariables['Entry_ChessAI_Nodes']\
+            .set(self.engine.data['ChessAI'].get('Nodes', 0))
+
+        self.builder.tkvariables['Entry_ChessAI_Stable_Depths']\
+            .set(self.engine.data['ChessAI'].get('Stable Depths', 4))
+
+        self.builder.tkvariables['Entry_ChessAI_Max_Time']\
+            .set(self.engine.data['ChessAI'].get('Max Time', 3000))
+
         self.builder.get_object('Stockfish_Debug_Log_File')\
             .config(path=self.engine.data['Stockfish']['Debug Log File'])
 
@@ -39,6 +60,23 @@ class ChessAISetting(ChessAIVision): #inherit
         Tooltip(self.builder.get_object('Label_ChessAI_Analyse_Every_Move'),\
             "Automatic analyse when you move a piece (not when set up)")
 
+        Tooltip(self.builder.get_object('Label_ChessAI_Depth'),\
+            "Stop analysing at this depth (0 for no limit)")
+
+        Tooltip(self.builder.get_object('Label_ChessAI_Movetime'),\
+            "Stop analysing after this many milliseconds (0 for no limit)")
+
+        Tooltip(self.builder.get_object('Label_ChessAI_Nodes'),\
+            "Stop analysing after this many nodes (0 for no limit). The first limit reached\
+\nstops the search, with no limit at all Stockfish's default depth is used")
+
+        Tooltip(self.builder.get_object('Label_ChessAI_Stable_Depths'),\
+            "Analyse Every Move stops once the best move stayed the same for this many depths\
+\n(0 to never)")
+
+        Tooltip(self.builder.get_object('Label_ChessAI_Max_Time'),\
+            "Analyse Every Move never takes longer than this many milliseconds (0 for no limit)")
+
         Tooltip(self.builder.get_object('Label_Stockfish_Debug_Log_File'),\
             "Path to file that save debug log (if needed)")
 
@@ -56,6 +94,10 @@ class ChessAISetting(ChessAIVision): #inherit
             "The size of the hash table in MB. It is recommended to set Hash after\
 \nsetting Threads. (min 1 max 33554432)")
 
+        Tooltip(self.builder.get_object('setting_tune'),\
+            "Find the fastest Threads and Hash on this machine (about 2 minutes) and save\
+\nthem, the measurements go to tune.json")
+
     def setting_data(self, widget_id):
         """
         Create logic for `bool` data but in `str` type. (idk, I just cant fix)
@@ -85,6 +127,16 @@ class ChessAISetting(ChessAIVision): #inherit
 
                 "Elo": self.builder.tkvariables['engine_elo'].get(),
                 "Current Template": self.engine.data['ChessAI']['Current Template'],
+                "Analysis Store": self.engine.data['ChessAI'].get('Analysis Store', ''),
+                "Opening Book": self.engine.data['ChessAI'].get('Opening Book', ''),
+                "Hot Spare": self.engine.data['ChessAI'].get('Hot Spare', False),
+                "Speculative Moves": self.engine.data['ChessAI'].get('Speculative Moves', 0),
+                "Review Workers": self.engine.data['ChessAI'].get('Review Workers', 4),
+                "Depth": self.builder.tkvariables['Entry_ChessAI_Depth'].get(),
+                "Movetime": self.builder.tkvariables['Entry_ChessAI_Movetime'].get(),
+                "Nodes": self.builder.tkvariables['Entry_ChessAI_Nodes'].get(),
+                "Stable Depths": self.builder.tkvariables['Entry_ChessAI_Stable_Depths'].get(),
+                "Max Time": self.builder.tkvariables['Entry_ChessAI_Max_Time'].get(),
             },
             "Stockfish": {
                 "Debug Log File": self.builder.tkvariables['Entry_Stockfish_Debug_Log_File'].get(),
@@ -109,6 +161,49 @@ class ChessAISetting(ChessAIVision): #inherit
 
         self.engine.data = data
 
+    def setting_tune(self):
+        """Tune Threads and Hash on a thread, `setting_tune_poll()` saves them when done."""
+        if self.tune_thread is not None and self.tune_thread.is_alive():
+            return
+
+        if getattr(sys, "frozen", False):
+            file_location = 'tune.json'
+        else:
+            file_location = PROJECT_PATH / 'tune.json'
+
+        def work():
+            try:
+                best: dict = tune_settings(self.engine.data, output=file_location)
+                # the running Stockfish gets them now, `setting_tune_poll()` saves them
+                self.engine.settings(best)
+                self.tune_result = best
+            except Exception as err: # Stockfish crashed or could not start
+                self.tune_result = str(err)
+
+        # the analysis would take CPU from the measurements
+        self.engine.stop()
+        self.tune_result = None
+        self.builder.get_object('setting_tune').config(text='Tuning...')
+        self.tune_thread = threading.Thread(target=work, daemon=True)
+        self.tune_thread.start()
+        self.mainwindow.after(500, self.setting_tune_poll)
+
+    def setting_tune_poll(self):
+        """Save the tuned Threads and Hash (already sent to Stockfish) through \
+`setting_update_data()` once found."""
+        if self.tune_thread.is_alive():
+            self.mainwindow.after(500, self.setting_tune_poll)
+            return
+
+        self.builder.get_object('setting_tune').config(text='Tune')
+        if isinstance(self.tune_result, str):
+            self.warning(f'Cannot tune Stockfish. ({self.tune_result})')
+            return
+
+        self.builder.tkvariables['Entry_Stockfish_Threads'].set(self.tune_result['Threads'])
+        self.builder.tkvariables['Entry_Stockfish_Hash'].set(self.tune_result['Hash'])
+        self.setting_update_data()
+
     def setting_warning(self) -> None:
         """Warn user if settings are changed."""
         def check(object_name: str, correct_answer: str | int) -> None:
@@ -128,6 +223,11 @@ class ChessAISetting(ChessAIVision): #inherit
                     .config(image=getattr(self, object_name))
 
         check('ChessAI_Analyse_Every_Move', str(self.engine.data['ChessAI']['Analyse Every Move']))
+        check('ChessAI_Depth', self.engine.data['ChessAI'].get('Depth', 15))
+        check('ChessAI_Movetime', self.engine.data['ChessAI'].get('Movetime', 0))
+        check('ChessAI_Nodes', self.engine.data['ChessAI'].get('Nodes', 0))
+        check('ChessAI_Stable_Depths', self.engine.data['ChessAI'].get('Stable Depths', 4))
+        check('ChessAI_Max_Time', self.engine.data['ChessAI'].get('Max Time', 3000))
         check('Stockfish_Debug_Log_File', self.engine.data['Stockfish']['Debug Log File'])
         check('Stockfish_UCI_Chess960', str(self.engine.data['Stockfish']['UCI_Chess960']))
         check('Stockfish_Min_Split_Depth', self.engine.data['Stockfish']['Min Split Depth'])
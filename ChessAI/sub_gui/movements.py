@@ -1,5 +1,7 @@
 """To define clearly pieces' movements"""
 
+from ..board import Board
+
 ALPHABET_DICT: dict = {
     "0": "a",
     "1": "b",
@@ -11,6 +13,8 @@ ALPHABET_DICT: dict = {
     "7": "h",
 }
 
+NUMBER_DICT: dict = {v: int(k) for k, v in ALPHABET_DICT.items()}
+
 class Movement:
     """For better movement visual."""
     def __init__(self):
@@ -26,6 +30,7 @@ class Movement:
 
         # dummy attributes
         self.engine = None
+        self.fen: str = ''
 
     def reset_moves(self) -> None:
         """Reset move."""
@@ -46,7 +51,8 @@ class Movement:
         ' ': empty\n
         '.': moven\n
         'o': kill\n
-        'x': current position
+        'x': current position\n
+        Legal moves come from `Board`, so no Stockfish is needed.
         """
         if self.move_board[y][x] == 'x':
             return
@@ -70,249 +76,28 @@ class Movement:
 
         self.move_board[y][x] = 'x'
 
-        # pawn move
-        if self.board[y][x].lower() == 'p':
-            for index_y in range(2):
-                for index_x in range(3):
-                    loc_x: int = x + index_x - 1
-                    loc_y: int
-                    if self.is_black:
-                        if self.black_side:
-                            loc_y = y + index_y - 2
-                            self.forward = True
-                        else:
-                            loc_y = y - index_y + 2
-                            self.forward = False
-                    else:
-                        if self.black_side:
-                            loc_y = y - index_y + 2
-                            self.forward = False
-                        else:
-                            loc_y = y + index_y - 2
-                            self.forward = True
-
-                    if not 0 <= loc_x <= 7:
-                        continue
-                    if not 0 <= loc_y <= 7:
-                        continue
-
-                    if self.black_side:
-                        last_move: str = f'{ALPHABET_DICT[str(7 - x)]}{y + 1}'
-                        move: str = f'{ALPHABET_DICT[str(7 - loc_x)]}{loc_y + 1}'
-                    else:
-                        last_move: str = f'{ALPHABET_DICT[str(x)]}{8 - y}'
-                        move: str = f'{ALPHABET_DICT[str(loc_x)]}{8 - loc_y}'
-
-                    if (self.forward and loc_y == 0) or (not self.forward and loc_y == 7):
-                        move += 'q'
-
-                    if not self.engine.check_move([last_move + move]):
-                        continue
-
-                    if index_y == 0 and index_x == 1:
-                        self.move_board[loc_y][loc_x] = '.'
-
-                    if index_y == 1 and (index_x == 0 or index_x == 2):
-                        self.move_board[loc_y][loc_x] = 'o'
-
-                    if index_y == 1 and index_x == 1:
-                        self.move_board[loc_y][loc_x] = '.'
-            return
-
-        # bishop move
-        elif self.board[y][x].lower() == 'b':
-            for loc_y in range(8):
-                if loc_y == y:
-                    continue
-
-                # you know... square triangle...
-                distant: int = loc_y - y
-
-                for loc_x in (x - distant, x + distant):
-                    if not 0 <= loc_x <= 7:
-                        continue
-
-                    if self.black_side:
-                        last_move: str = f'{ALPHABET_DICT[str(7 - x)]}{y + 1}'
-                        move: str = f'{ALPHABET_DICT[str(7 - loc_x)]}{loc_y + 1}'
-                    else:
-                        last_move: str = f'{ALPHABET_DICT[str(x)]}{8 - y}'
-                        move: str = f'{ALPHABET_DICT[str(loc_x)]}{8 - loc_y}'
-
-                    if not self.engine.check_move([last_move + move]):
-                        continue
-
-                    if self.board[loc_y][loc_x] == 'e':
-                        self.move_board[loc_y][loc_x] = '.'
-                        continue
-                    self.move_board[loc_y][loc_x] = 'o'
-            return
-
-        # knight move
-        elif self.board[y][x].lower() == 'n':
-            knight_pattern = ((-2, -1),(-2, 1),(-1, -2),(-1, 2),(1, -2),(1, 2),(2, -1),(2, 1))
-            for index_x, index_y in knight_pattern:
-                loc_x = index_x + x
-                loc_y = index_y + y
-
-                if not 0 <= loc_x <= 7 or not 0 <= loc_y <= 7:
-                    continue
-
-                if self.black_side:
-                    last_move: str = f'{ALPHABET_DICT[str(7 - x)]}{y + 1}'
-                    move: str = f'{ALPHABET_DICT[str(7 - loc_x)]}{loc_y + 1}'
-                else:
-                    last_move: str = f'{ALPHABET_DICT[str(x)]}{8 - y}'
-                    move: str = f'{ALPHABET_DICT[str(loc_x)]}{8 - loc_y}'
-
-                if not self.engine.check_move([last_move + move]):
-                    continue
-
-                if self.board[loc_y][loc_x] == 'e':
-                    self.move_board[loc_y][loc_x] = '.'
-                    continue
-                self.move_board[loc_y][loc_x] = 'o'
-            del knight_pattern
-            return
-
-        # rook move
-        elif self.board[y][x].lower() == 'r':
-            for loc_x in range(8):
-                if self.black_side:
-                    last_move: str = f'{ALPHABET_DICT[str(7 - x)]}{y + 1}'
-                    move: str = f'{ALPHABET_DICT[str(7 - loc_x)]}{y + 1}'
-                else:
-                    last_move: str = f'{ALPHABET_DICT[str(x)]}{8 - y}'
-                    move: str = f'{ALPHABET_DICT[str(loc_x)]}{8 - y}'
-
-                if not self.engine.check_move([last_move + move]):
-                    continue
-
-                if self.board[y][loc_x] == 'e':
-                    self.move_board[y][loc_x] = '.'
-                    continue
-                self.move_board[y][loc_x] = 'o'
-
-            for loc_y in range(8):
-                if self.black_side:
-                    last_move: str = f'{ALPHABET_DICT[str(7 - x)]}{y + 1}'
-                    move: str = f'{ALPHABET_DICT[str(7 - x)]}{loc_y + 1}'
-                else:
-                    last_move: str = f'{ALPHABET_DICT[str(x)]}{8 - y}'
-                    move: str = f'{ALPHABET_DICT[str(x)]}{8 - loc_y}'
+        # the side moving up the chessboard promotes at y == 0
+        self.forward = self.is_black == self.black_side
 
-                if not self.engine.check_move([last_move + move]):
-                    continue
-
-                if self.board[loc_y][x] == 'e':
-                    self.move_board[loc_y][x] = '.'
-                    continue
-                self.move_board[loc_y][x] = 'o'
-            return
-
-        # queen move
-        elif self.board[y][x].lower() == 'q':
-            for loc_y in range(8):
-                if loc_y == y:
-                    continue
-
-                # you know... square triangle...
-                distant: int = loc_y - y
-
-                for loc_x in (x - distant, x + distant):
-                    if not 0 <= loc_x <= 7:
-                        continue
-
-                    if self.black_side:
-                        last_move: str = f'{ALPHABET_DICT[str(7 - x)]}{y + 1}'
-                        move: str = f'{ALPHABET_DICT[str(7 - loc_x)]}{loc_y + 1}'
-                    else:
-                        last_move: str = f'{ALPHABET_DICT[str(x)]}{8 - y}'
-                        move: str = f'{ALPHABET_DICT[str(loc_x)]}{8 - loc_y}'
-
-                    if not self.engine.check_move([last_move + move]):
-                        continue
-
-                    if self.board[loc_y][loc_x] == 'e':
-                        self.move_board[loc_y][loc_x] = '.'
-                        continue
-                    self.move_board[loc_y][loc_x] = 'o'
-
-            for loc_x in range(8):
-                if self.black_side:
-                    last_move: str = f'{ALPHABET_DICT[str(7 - x)]}{y + 1}'
-                    move: str = f'{ALPHABET_DICT[str(7 - loc_x)]}{y + 1}'
-                else:
-                    last_move: str = f'{ALPHABET_DICT[str(x)]}{8 - y}'
-                    move: str = f'{ALPHABET_DICT[str(loc_x)]}{8 - y}'
-
-                if not self.engine.check_move([last_move + move]):
-                    continue
-
-                if self.board[y][loc_x] == 'e':
-                    self.move_board[y][loc_x] = '.'
-                    continue
-                self.move_board[y][loc_x] = 'o'
-
-            for loc_y in range(8):
-                if self.black_side:
-                    last_move: str = f'{ALPHABET_DICT[str(7 - x)]}{y + 1}'
-                    move: str = f'{ALPHABET_DICT[str(7 - x)]}{loc_y + 1}'
-                else:
-                    last_move: str = f'{ALPHABET_DICT[str(x)]}{8 - y}'
-                    move: str = f'{ALPHABET_DICT[str(x)]}{8 - loc_y}'
-
-                if not self.engine.check_move([last_move + move]):
-                    continue
-
-                if self.board[loc_y][x] == 'e':
-                    self.move_board[loc_y][x] = '.'
-                    continue
-                self.move_board[loc_y][x] = 'o'
-            return
-
-        # king move
+        if self.black_side:
+            last_move: str = f'{ALPHABET_DICT[str(7 - x)]}{y + 1}'
         else:
-            for index_y in range(2):
-                for index_x in range(3):
-                    loc_x: int = x + index_x - 1
-                    loc_y: int = y + 2 * index_y - 1
-
-                    if not 0 <= loc_x <= 7 or not 0 <= loc_y <= 7:
-                        continue
-
-                    # check if the king can move
-                    if self.black_side:
-                        last_move: str = f'{ALPHABET_DICT[str(7 - x)]}{y + 1}'
-                        move: str = f'{ALPHABET_DICT[str(7 - loc_x)]}{loc_y + 1}'
-                    else:
-                        last_move: str = f'{ALPHABET_DICT[str(x)]}{8 - y}'
-                        move: str = f'{ALPHABET_DICT[str(loc_x)]}{8 - loc_y}'
-
-                    if not self.engine.check_move([last_move + move]):
-                        continue
-
-                    if self.board[loc_y][loc_x] == 'e':
-                        self.move_board[loc_y][loc_x] = '.'
-                        continue
-
-                    self.move_board[loc_y][loc_x] = 'o'
-
-            for index_x in range(8):
-                # check if the king can move
-                if self.black_side:
-                    last_move: str = f'{ALPHABET_DICT[str(7 - x)]}{y + 1}'
-                    move: str = f'{ALPHABET_DICT[str(7 - index_x)]}{y + 1}'
-                else:
-                    last_move: str = f'{ALPHABET_DICT[str(x)]}{8 - y}'
-                    move: str = f'{ALPHABET_DICT[str(index_x)]}{8 - y}'
-
-                if not self.engine.check_move([last_move + move]):
-                    continue
-
-                if self.board[y][index_x] == 'e':
-                    self.move_board[y][index_x] = '.'
-                    continue
-
-                self.move_board[y][index_x] = 'o'
-            return
+            last_move: str = f'{ALPHABET_DICT[str(x)]}{8 - y}'
+
+        try:
+            board = Board(self.fen, chess960=self.engine.data['Stockfish']['UCI_Chess960'])
+            moves: list[str] = board.legal_moves(last_move)
+        except ValueError: # broken FEN while setting up
+            moves = []
+
+        for move in moves:
+            loc_x: int = NUMBER_DICT[move[2]]
+            loc_y: int = 8 - int(move[3])
+            if self.black_side:
+                loc_x, loc_y = 7 - loc_x, 7 - loc_y
+
+            # en passant lands on an empty square but still kills
+            if self.board[loc_y][loc_x] == 'e' and (self.board[y][x].lower() != 'p' or loc_x == x):
+                self.move_board[loc_y][loc_x] = '.'
+                continue
+            self.move_board[loc_y][loc_x] = 'o'
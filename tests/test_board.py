@@ -0,0 +1,131 @@
+"""Tests of the board, perft counts and SAN round trips."""
+
+import unittest
+
+from ChessAI.board import STARTING_FEN, Board, is_fen_valid, parse_square
+
+# (FEN, Chess960, depth, leaf nodes), from the Chess Programming Wiki perft results
+PERFT_POSITIONS: tuple = (
+    (STARTING_FEN, False, 3, 8902),
+    ('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1', False, 2, 2039),
+    ('8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1', False, 3, 2812),
+    ('r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1', False, 3, 9467),
+    ('rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8', False, 2, 1486),
+    ('r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10', False, 2, 2079),
+    ('bqnb1rkr/pp3ppp/3ppn2/2p5/5P2/P2P4/NPP1P1PP/BQ1BNRKR w HFhf - 2 9', True, 3, 12189),
+    ('2nnrbkr/p1qppppp/8/1ppb4/6PP/3PP3/PPP2P2/BQNNRBKR w HEhe - 1 9', True, 3, 18002),
+)
+
+def perft(board: Board, depth: int) -> int:
+    """Count the leaf nodes of the move tree."""
+    moves: list[str] = board.legal_moves()
+    if depth == 1:
+        return len(moves)
+    total: int = 0
+    for move in moves:
+        child: Board = board.copy()
+        child.push(move)
+        total += perft(child, depth - 1)
+    return total
+
+def write_san(board: Board, move: str, moves: list[str]) -> str:
+    """Write a legal move in SAN, `moves` being every legal move of the position."""
+    symbol: str = board.piece_at(parse_square(move[:2]))
+    captured: str = board.piece_at(parse_square(move[2:4]))
+    target: str = move[2:4]
+
+    # the king goes 2 files (standard) or takes its own rook (Chess960)
+    if symbol.lower() == 'k' and (abs(ord(move[2]) - ord(move[0])) > 1
+                                  or captured and captured.isupper() == symbol.isupper()):
+        return 'O-O' if move[2] > move[0] else 'O-O-O'
+
+    if symbol.lower() == 'p':
+        # en passant takes on an empty square
+        if move[0] != move[2]:
+            return f'{move[0]}x{target}' + (f'={move[4].upper()}' if len(move) == 5 else '')
+        return target + (f'={move[4].upper()}' if len(move) == 5 else '')
+
+    # the other pieces of that kind going there
+    others: list[str] = [other for other in moves if other != move and other[2:4] == target
+                         and board.piece_at(parse_square(other[:2])) == symbol]
+    origin: str = ''
+    if others:
+        if all(other[0] != move[0] for other in others):
+            origin = move[0]
+        elif all(other[1] != move[1] for other in others):
+            origin = move[1]
+        else:
+            origin = move[:2]
+    return symbol.upper() + origin + ('x' if captured else '') + target
+
+class TestBoard(unittest.TestCase):
+    """Legal moves and SAN of the bitboard `Board`."""
+    def test_perft(self):
+        for fen, chess960, depth, nodes in PERFT_POSITIONS:
+            with self.subTest(fen=fen):
+                self.assertEqual(perft(Board(fen, chess960=chess960), depth), nodes)
+
+    def test_fen_round_trip(self):
+        # Chess960 castling rights are written as KQkq when it is the outermost rook
+        for fen, chess960, _, _ in PERFT_POSITIONS:
+            with self.subTest(fen=fen):
+                board = Board(fen, chess960=chess960)
+                self.assertEqual(Board(board.fen(), chess960=chess960).fen(), board.fen())
+                if not chess960:
+                    self.assertEqual(board.fen(), fen)
+
+    def test_san_round_trip(self):
+        for fen, chess960, _, _ in PERFT_POSITIONS:
+            board = Board(fen, chess960=chess960)
+            moves: list[str] = board.legal_moves()
+            for move in moves:
+                san: str = write_san(board, move, moves)
+                with self.subTest(fen=fen, move=move, san=san):
+                    self.assertEqual(board.parse_san(san), move)
+
+    def test_illegal_moves(self):
+        board = Board()
+        self.assertFalse(board.is_legal('e2e5'))
+        self.assertFalse(board.is_legal('e1g1'))
+        with self.assertRaises(ValueError):
+            board.parse_san('Nd4')
+        with self.assertRaises(ValueError):
+            board.parse_san('O-O')
+
+    def test_standard_castling(self):
+        # only the king on e1/e8 castles with a corner rook, written as the king's move
+        board = Board('r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1')
+        self.assertIn('e1g1', board.legal_moves('e1'))
+        self.assertNotIn('e1h1', board.legal_moves('e1'))
+        for fen in ('4k3/8/8/8/8/8/8/R2K3R w K - 0 1', '1r2k3/8/8/8/8/8/8/4K3 b q - 0 1'):
+            with self.subTest(fen=fen):
+                self.assertEqual(Board(fen).castling_fen(), '-')
+                self.assertNotEqual(Board(fen, chess960=True).castling_fen(), '-')
+        self.assertNotIn('d1h1', Board('4k3/8/8/8/8/8/8/R2K3R w K - 0 1').legal_moves('d1'))
+        self.assertIn('d1h1', Board('4k3/8/8/8/8/8/8/R2K3R w K - 0 1', chess960=True)
+                      .legal_moves('d1'))
+
+    def test_is_fen_valid(self):
+        for fen, chess960, _, _ in PERFT_POSITIONS:
+            with self.subTest(fen=fen):
+                self.assertTrue(is_fen_valid(fen, chess960))
+        for fen in (
+            '4k3/8/8/8/8/8/8/R2K3R w K - 0 1', # the king is not on e1
+            '1r2k3/8/8/8/8/8/8/4K3 w q - 0 1', # the rook is not on a8
+            'r3k2r/8/8/8/8/8/8/R3K2R w KKkq - 0 1', # the same right twice
+            '4k3/8/8/8/8/8/8/4K3 w K - 0 1', # no rook
+            'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq e3 0 1', # no pawn moved
+            '4k3/8/8/8/8/8/8/4R1K1 w - - 0 1', # the side not to move is in check
+            '4k3/8/8/8/8/8/8/4K3 w - - 0 0',
+            '4k3/8/8/8/8/8/8/8 w - - 0 1',
+            '4k2P/8/8/8/8/8/8/4K3 b - - 0 1',
+            '4k3/8/8/8/8/8/8/4K3 w -',
+        ):
+            with self.subTest(fen=fen):
+                self.assertFalse(is_fen_valid(fen))
+        # fine in Chess960
+        self.assertTrue(is_fen_valid('4k3/8/8/8/8/8/8/R2K3R w K - 0 1', True))
+        self.assertTrue(is_fen_valid('1r2k3/8/8/8/8/8/8/4K3 w q - 0 1', True))
+
+if __name__ == '__main__':
+    unittest.main()
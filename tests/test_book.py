@@ -0,0 +1,85 @@
+"""Tests of the Polyglot opening book, its keys and its lookup."""
+
+import os
+import tempfile
+import unittest
+
+from ChessAI.board import Board, parse_square
+from ChessAI.book import ENTRY, OpeningBook, polyglot_key
+
+# (moves from the start, key), from the Polyglot book format's reference keys
+REFERENCE_KEYS: tuple = (
+    ((), 0x463b96181691fc9c),
+    (('e2e4',), 0x823c9b50fd114196),
+    (('e2e4', 'd7d5'), 0x0756b94461c50fb0),
+    (('e2e4', 'd7d5', 'e4e5'), 0x662fafb965db29d4),
+    (('e2e4', 'd7d5', 'e4e5', 'f7f5'), 0x22a48b5a8e47ff78),
+    (('e2e4', 'd7d5', 'e4e5', 'f7f5', 'e1e2'), 0x652a607ca3f242c1),
+    (('e2e4', 'd7d5', 'e4e5', 'f7f5', 'e1e2', 'e8f7'), 0x00fdd303c946bdd9),
+    (('a2a4', 'b7b5', 'h2h4', 'b5b4', 'c2c4'), 0x3c8123ea7b067637),
+    (('a2a4', 'b7b5', 'h2h4', 'b5b4', 'c2c4', 'b4c3', 'a1a3'), 0x5c3f9b829b279560),
+)
+CASTLING_FEN: str = 'r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1'
+
+def raw_move(move: str) -> int:
+    """A move as Polyglot writes it: to, from and promotion bits."""
+    promotion: int = ' nbrq'.index(move[4]) if len(move) == 5 else 0
+    return parse_square(move[2:4]) | parse_square(move[:2]) << 6 | promotion << 12
+
+class TestOpeningBook(unittest.TestCase):
+    """`polyglot_key()` and `OpeningBook` on a small written book."""
+    def setUp(self):
+        start: int = polyglot_key(Board())
+        castling: int = polyglot_key(Board(CASTLING_FEN))
+        entries: list[tuple] = [
+            (start, raw_move('e2e4'), 10),
+            (start, raw_move('d2d4'), 30),
+            (start, raw_move('g1f3'), 0), # never played
+            (start, raw_move('e2e5'), 50), # not legal
+            (start, raw_move('e2e4'), 5), # weights of the same move add up
+            (castling, raw_move('e1h1'), 1), # king takes rook
+            (castling, raw_move('e1a1'), 1),
+        ]
+        self.directory = tempfile.TemporaryDirectory()
+        self.path: str = os.path.join(self.directory.name, 'book.bin')
+        with open(self.path, mode='wb') as write_file:
+            for key, raw, weight in sorted(entries, key=lambda entry: entry[0]):
+                write_file.write(ENTRY.pack(key, raw, weight, 0))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_keys(self):
+        for moves, key in REFERENCE_KEYS:
+            board = Board()
+            for move in moves:
+                board.push(move)
+            with self.subTest(moves=moves):
+                self.assertEqual(polyglot_key(board), key)
+
+    def test_moves(self):
+        with OpeningBook(self.path) as book:
+            self.assertEqual(book.moves(Board()), [('d2d4', 30), ('e2e4', 15)])
+            self.assertEqual(sorted(book.moves(Board(CASTLING_FEN))), [('e1c1', 1), ('e1g1', 1)])
+            self.assertEqual(sorted(book.moves(Board(CASTLING_FEN, chess960=True))),
+                             [('e1a1', 1), ('e1h1', 1)])
+            board = Board()
+            board.push('e2e4')
+            self.assertEqual(book.moves(board), [])
+
+    def test_analysis(self):
+        with OpeningBook(self.path) as book:
+            analysis: dict = book.analysis(Board(), 1)
+            self.assertTrue(analysis['book'])
+            self.assertEqual(analysis['value'], 66)
+            self.assertEqual([move['Move'] for move in analysis['moves']], ['d2d4'])
+            self.assertEqual(book.analysis(Board('4k3/8/8/8/8/8/8/4K3 w - - 0 1')), {})
+
+    def test_empty(self):
+        with open(self.path, mode='wb') as write_file:
+            write_file.close()
+        with OpeningBook(self.path) as book:
+            self.assertEqual(book.moves(Board()), [])
+
+if __name__ == '__main__':
+    unittest.main()
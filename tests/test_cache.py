@@ -0,0 +1,106 @@
+"""Tests of the analysis cache, its eviction and which result it keeps."""
+
+import json
+import unittest
+
+from ChessAI.cache import AnalysisCache, covers
+
+def analysis(depth: int, multipv: int = 1, value: int = 0, searched: dict | None = None,
+             time: int = 0, nodes: int = 0, stable: bool = False) -> dict:
+    """A small analysis, as `Engine.analyse()` caches it, `searched` with these `limits()`."""
+    return {'type': 'cp', 'value': value, 'depth': depth, 'multipv': multipv,
+            'time': time, 'nodes': nodes, 'stable': stable,
+            'limits': {key: value for key, value in (searched or limits()).items()
+                       if key != 'stable'},
+            'moves': [{'Move': 'e2e4', 'Centipawn': value, 'Mate': None, 'PV': ['e2e4']}]}
+
+def limits(depth: int | None = None, movetime: int | None = None, nodes: int | None = None,
+           stable: int = 0) -> dict:
+    """The limits of a search, as `Engine.search_limits()` gives them."""
+    return {'depth': depth, 'movetime': movetime, 'nodes': nodes, 'stable': stable}
+
+class TestAnalysisCache(unittest.TestCase):
+    """LRU eviction and the replace rule of `AnalysisCache`."""
+    def test_get(self):
+        cache = AnalysisCache()
+        cache.put(('a',), analysis(10, 2))
+        self.assertEqual(cache.get(('a',), 2, limits(10))['depth'], 10)
+        self.assertIsNone(cache.get(('a',), 1, limits(11)))
+        self.assertIsNone(cache.get(('a',), 3))
+        self.assertIsNone(cache.get(('b',)))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 3)
+
+    def test_evict_entries(self):
+        cache = AnalysisCache(max_entries=2)
+        cache.put(('a',), analysis(10))
+        cache.put(('b',), analysis(10))
+        cache.get(('a',)) # now b is the least recently used
+        cache.put(('c',), analysis(10))
+        self.assertIsNotNone(cache.get(('a',)))
+        self.assertIsNone(cache.get(('b',)))
+        self.assertIsNotNone(cache.get(('c',)))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_evict_bytes(self):
+        size: int = len(json.dumps(analysis(10))) + 64
+        cache = AnalysisCache(max_bytes=size * 2)
+        for key in 'abc':
+            cache.put((key,), analysis(10))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats()['bytes'], size * 2)
+        self.assertIsNone(cache.get(('a',)))
+
+        cache.clear()
+        self.assertEqual((len(cache), cache.stats()['bytes']), (0, 0))
+
+    def test_replace(self):
+        cache = AnalysisCache()
+        cache.put(('a',), analysis(12, 1, value=1))
+        cache.put(('a',), analysis(10, 2, value=2)) # shallower, kept out
+        self.assertEqual(cache.get(('a',))['value'], 1)
+        cache.put(('a',), analysis(12, 2, value=3)) # as deep, more moves
+        self.assertEqual(cache.get(('a',))['value'], 3)
+        cache.put(('a',), analysis(12, 1, value=4)) # as deep, fewer moves
+        self.assertEqual(cache.get(('a',))['value'], 3)
+        cache.put(('a',), analysis(14, 1, value=5)) # deeper
+        self.assertEqual(cache.get(('a',))['value'], 5)
+        cache.put(('a',), analysis(12, 2, value=6)) # never back and forth
+        self.assertEqual(cache.get(('a',))['value'], 5)
+        cache.put(('a',), analysis(20, 2, value=7, stable=True)) # cut short
+        self.assertEqual(cache.get(('a',))['value'], 5)
+        self.assertEqual(len(cache), 1)
+
+    def test_covers(self):
+        # by depth, it answers any search as shallow
+        deep = analysis(20, searched=limits(20), time=800, nodes=10**6)
+        self.assertTrue(covers(deep, 1, limits(depth=18)))
+        self.assertTrue(covers(deep, 1, limits(depth=18, movetime=5000)))
+        self.assertFalse(covers(deep, 1, limits(depth=22)))
+        self.assertFalse(covers(deep, 2, limits(depth=18)))
+        # but not a longer search by time or nodes
+        self.assertFalse(covers(deep, 1, limits(movetime=5000)))
+        self.assertFalse(covers(deep, 1, limits(nodes=2 * 10**6)))
+        self.assertTrue(covers(deep, 1, limits(nodes=10**6)))
+
+        # by time, the last info may come a bit before the movetime
+        timed = analysis(14, searched=limits(movetime=5000), time=4990)
+        self.assertTrue(covers(timed, 1, limits(movetime=5000)))
+        self.assertFalse(covers(timed, 1, limits(movetime=6000)))
+        self.assertFalse(covers(timed, 1, limits(depth=15)))
+        # same for nodes
+        self.assertTrue(covers(analysis(12, searched=limits(nodes=10**6), nodes=999_000), 1,
+                               limits(nodes=10**6)))
+
+        # cut short by "Stable Depths" or stopped at "Max Time", only for "Analyse Every Move"
+        adaptive = analysis(6, searched=limits(15, 3000), time=300, stable=True)
+        self.assertFalse(covers(adaptive, 1, limits(movetime=5000)))
+        self.assertFalse(covers(adaptive, 1, limits(depth=6)))
+        self.assertTrue(covers(adaptive, 1, limits(depth=15, movetime=3000, stable=4)))
+        ceiling = analysis(12, searched=limits(15, 3000), time=2990)
+        self.assertFalse(covers(ceiling, 1, limits(movetime=5000)))
+        self.assertFalse(covers(ceiling, 1, limits(depth=15)))
+        self.assertTrue(covers(ceiling, 1, limits(depth=15, movetime=3000, stable=4)))
+
+if __name__ == '__main__':
+    unittest.main()
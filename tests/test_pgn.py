@@ -0,0 +1,87 @@
+"""Tests of the PGN reader, on comments, NAGs, variations and chunk boundaries."""
+
+import io
+import os
+import tempfile
+import unittest
+
+from ChessAI.pgn import read_pgn, san_moves
+
+GAMES: str = '''[Event "First"]
+[White "A"]
+[Black "B"]
+[Result "1-0"]
+
+1. e4 {best by test (1. d4 is fine)} e5 $1 2. Nf3 (2. f4 exf4 (2... d5) 3. Nf3) 2... Nc6!?
+; a line comment ( with a parenthesis
+3. Bb5 {a comment
+on two lines} a6 $14 1-0
+
+[Event "Second"]
+[White "C"]
+[Black "D"]
+[Result "*"]
+
+1. d4 d5 2. c4 *
+
+[Event "Third"]
+[FEN "4k3/8/8/8/8/8/8/R3K3 w Q - 0 1"]
+[SetUp "1"]
+
+1. O-O-O Ke7 1/2-1/2
+'''
+
+class TestPGN(unittest.TestCase):
+    """`read_pgn()` and `san_moves()`."""
+    def test_san_moves(self):
+        self.assertEqual(list(san_moves('1. e4 {1... c5 2. Nf3} e5 $2 (1... c5 (1... e6) 2. Nf3) '
+                                        '2. Nf3 ; 2. f4\n 2... Nc6 1-0')),
+                         ['e4', 'e5', 'Nf3', 'Nc6'])
+
+    def test_read(self):
+        positions: list[tuple] = list(read_pgn(io.StringIO(GAMES)))
+        moves: list[str] = [move for _, _, _, move in positions]
+        self.assertEqual(moves, ['e2e4', 'e7e5', 'g1f3', 'b8c6', 'f1b5', 'a7a6',
+                                 'd2d4', 'd7d5', 'c2c4',
+                                 'e1c1', 'e8e7'])
+
+        headers, ply, fen, move = positions[6]
+        self.assertEqual((headers['Event'], headers['White'], ply, move),
+                         ('Second', 'C', 0, 'd2d4'))
+        self.assertEqual(fen, 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1')
+        self.assertEqual(positions[-1][2], '4k3/8/8/8/8/8/8/2KR4 b - - 1 1')
+
+    def test_chunks(self):
+        # every chunk size cuts the lines, the headers and the comments somewhere else
+        expected: list[tuple] = list(read_pgn(io.StringIO(GAMES)))
+        for chunk_size in (1, 2, 7, 64, len(GAMES) - 1):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(list(read_pgn(io.BytesIO(GAMES.encode('utf-8')),
+                                               chunk_size=chunk_size)), expected)
+
+    def test_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path: str = os.path.join(directory, 'games.pgn')
+            with open(path, mode='w', encoding='utf-8') as write_file:
+                write_file.write(GAMES)
+            self.assertEqual(list(read_pgn(path)), list(read_pgn(io.StringIO(GAMES))))
+
+            # an empty file can not be mapped
+            with open(path, mode='w', encoding='utf-8') as write_file:
+                write_file.close()
+            self.assertEqual(list(read_pgn(path)), [])
+
+    def test_header_filter(self):
+        positions: list[tuple] = list(read_pgn(io.StringIO(GAMES),
+                                               lambda headers: headers.get('White') == 'C'))
+        self.assertEqual([move for _, _, _, move in positions], ['d2d4', 'd7d5', 'c2c4'])
+
+    def test_illegal(self):
+        text: str = '[Event "Bad"]\n\n1. e4 e5 2. Ke3 Nc6 *\n'
+        with self.assertRaises(ValueError):
+            list(read_pgn(io.StringIO(text)))
+        positions: list[tuple] = list(read_pgn(io.StringIO(text), strict=False))
+        self.assertEqual([move for _, _, _, move in positions], ['e2e4', 'e7e5'])
+
+if __name__ == '__main__':
+    unittest.main()
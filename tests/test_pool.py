@@ -0,0 +1,51 @@
+"""Tests of how the engine pool splits the CPUs and the Threads and Hash budgets."""
+
+import unittest
+from unittest import mock
+
+from ChessAI.engine import assign_cores, split_threads
+
+# 8 cores with 2 hyperthreads each, numbered like Linux does (cpu 8 is the sibling of cpu 0)
+EIGHT_CORES: list[list[int]] = [[core, core + 8] for core in range(8)]
+
+class TestAssignCores(unittest.TestCase):
+    """`assign_cores()` on a faked topology."""
+    def assign(self, workers: int, threads: int, cores: list[list[int]] = EIGHT_CORES) -> list:
+        with mock.patch('ChessAI.engine.physical_cores', return_value=cores):
+            return assign_cores(workers, threads, 'dedicated')
+
+    def test_shared(self):
+        self.assertEqual(assign_cores(3, 8), [(None, 3), (None, 3), (None, 2)])
+        self.assertEqual(assign_cores(2, 1), [(None, 1), (None, 1)])
+        with self.assertRaises(ValueError):
+            assign_cores(2, 2, 'pinned')
+
+    def test_whole_cores(self):
+        self.assertEqual(self.assign(2, 8), [({0, 1, 2, 3}, 4), ({4, 5, 6, 7}, 4)])
+        self.assertEqual(self.assign(3, 3), [({0}, 1), ({1}, 1), ({2}, 1)])
+        # the budget is not above the cores, hyperthreads stay idle
+        self.assertEqual(self.assign(4, 16), [({0, 1}, 2), ({2, 3}, 2), ({4, 5}, 2), ({6, 7}, 2)])
+
+    def test_more_workers_than_cores(self):
+        assigned: list = self.assign(12, 12)
+        self.assertEqual([count for _, count in assigned], [1] * 12)
+        cpus: list[int] = [cpu for cpus, _ in assigned for cpu in cpus]
+        # a core each for the first 8, then hyperthreads, never the same CPU twice
+        self.assertEqual(cpus, list(range(12)))
+        self.assertEqual(len({cpu % 8 for cpu in cpus[:8]}), 8)
+
+    def test_more_workers_than_cpus(self):
+        assigned: list = self.assign(5, 5, [[0, 2], [1, 3]])
+        self.assertEqual([cpus for cpus, _ in assigned], [{0}, {1}, {2}, {3}, {0}])
+        self.assertEqual([count for _, count in assigned], [1] * 5)
+
+class TestSplitThreads(unittest.TestCase):
+    """`split_threads()`, for Threads and Hash."""
+    def test_split(self):
+        self.assertEqual(split_threads(8, 3), [3, 3, 2])
+        self.assertEqual(split_threads(100, 3), [34, 33, 33])
+        # at least 1 each
+        self.assertEqual(split_threads(1, 3), [1, 1, 1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+"""Tests of the game review, its winning chances and how moves are judged."""
+
+import unittest
+
+from ChessAI.board import Board
+from ChessAI.review import CP_CEILING, judge, winning_chances
+
+class TestReview(unittest.TestCase):
+    """`winning_chances()` and `judge()`."""
+    def test_judge(self):
+        for loss, judgement in ((0.0, None), (0.099, None), (0.1, 'inaccuracy'),
+                                (0.199, 'inaccuracy'), (0.2, 'mistake'), (0.299, 'mistake'),
+                                (0.3, 'blunder'), (2.0, 'blunder')):
+            with self.subTest(loss=loss):
+                self.assertEqual(judge(loss), judgement)
+
+    def test_winning_chances(self):
+        board = Board()
+        self.assertEqual(winning_chances({'type': 'cp', 'value': 0}, board), 0.0)
+        ahead: float = winning_chances({'type': 'cp', 'value': 300}, board)
+        self.assertAlmostEqual(ahead, -winning_chances({'type': 'cp', 'value': -300}, board))
+        self.assertTrue(0.4 < ahead < 0.6)
+
+        # mates and bigger leads are all as winning as the ceiling
+        ceiling: float = winning_chances({'type': 'cp', 'value': CP_CEILING}, board)
+        self.assertEqual(winning_chances({'type': 'cp', 'value': 5000}, board), ceiling)
+        self.assertEqual(winning_chances({'type': 'mate', 'value': 3}, board), ceiling)
+        self.assertAlmostEqual(winning_chances({'type': 'mate', 'value': -3}, board), -ceiling)
+
+    def test_game_end(self):
+        # no analysis when there is no legal move
+        mated = Board('rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3')
+        self.assertEqual(winning_chances({}, mated), -1.0)
+        stalemate = Board('7k/5Q2/6K1/8/8/8/8/8 b - - 0 1')
+        self.assertEqual(winning_chances({}, stalemate), 0.0)
+
+    def test_drop(self):
+        # from +1.0 to -1.0 for the mover is a blunder, +0.5 to +0.2 is an inaccuracy
+        board = Board()
+        def loss(before: int, after: int) -> float:
+            return winning_chances({'type': 'cp', 'value': before}, board)\
+                - winning_chances({'type': 'cp', 'value': after}, board)
+        self.assertEqual(judge(loss(100, -100)), 'blunder')
+        self.assertEqual(judge(loss(50, 20)), None)
+        self.assertEqual(judge(loss(50, -20)), 'inaccuracy')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""Tests of the analysis store, which result it keeps and what it prunes."""
+
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from ChessAI.store import AnalysisStore
+
+def analysis(depth: int, multipv: int = 1, value: int = 0) -> dict:
+    """A small analysis, as `Engine.analyse()` stores it."""
+    return {'type': 'cp', 'value': value, 'depth': depth, 'multipv': multipv,
+            'moves': [{'Move': 'e2e4', 'Centipawn': value, 'Mate': None, 'PV': ['e2e4']}]}
+
+class TestAnalysisStore(unittest.TestCase):
+    """The upsert and prune rules of `AnalysisStore`."""
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path: str = os.path.join(self.directory.name, 'analyses.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, *analyses: dict, key: int = 1) -> dict | None:
+        """Store the analyses one after the other, then read back what was kept."""
+        store = AnalysisStore(self.path)
+        for item in analyses:
+            store.put(key, 'Stockfish 17', '()', item)
+        store.close() # waits for the writer
+        store = AnalysisStore(self.path)
+        try:
+            return store.get(key, 'Stockfish 17', '()')
+        finally:
+            store.close()
+
+    def test_get(self):
+        # Zobrist keys go above SQLite's signed 64-bit integers
+        key: int = (1 << 64) - 5
+        self.assertEqual(self.write(analysis(10), key=key)['depth'], 10)
+        store = AnalysisStore(self.path)
+        self.assertIsNone(store.get(key, 'Stockfish 16', '()'))
+        self.assertIsNone(store.get(key, 'Stockfish 17', "(False,)"))
+        self.assertEqual(len(store), 1)
+        store.close()
+
+    def test_upsert(self):
+        # shallower, kept out
+        self.assertEqual(self.write(analysis(12, 1, 1), analysis(10, 2, 2))['value'], 1)
+        # as deep with more moves, then fewer
+        self.assertEqual(self.write(analysis(12, 2, 3), analysis(12, 1, 4))['value'], 3)
+        # deeper, then never back and forth
+        self.assertEqual(self.write(analysis(14, 1, 5), analysis(12, 2, 6))['value'], 5)
+        # cut short by "Stable Depths", however deep
+        self.assertEqual(self.write(analysis(14, 1, 7), dict(analysis(20, 2, 8), stable=True),
+                                    key=2)['value'], 7)
+        self.assertEqual(self.write(dict(analysis(20, 2, 8), stable=True), analysis(10, 1, 9),
+                                    key=3)['value'], 9)
+
+    def test_prune(self):
+        store = AnalysisStore(self.path, max_entries=2, max_age=1)
+        store.close()
+        connection = sqlite3.connect(self.path)
+        now: float = time.time()
+        with connection:
+            connection.executemany(
+                'INSERT INTO analyses VALUES (?, ?, ?, ?, ?, ?)',
+                [(key, 'Stockfish 17', '()', 10, '{}', now - age * 3600)
+                 for key, age in ((1, 48), (2, 3), (3, 2), (4, 1))])
+
+        store._prune(connection)
+        keys: list[int] = [row[0] for row in connection.execute(
+            'SELECT key FROM analyses ORDER BY key')]
+        connection.close()
+        # too old, then the oldest above max_entries
+        self.assertEqual(keys, [3, 4])
+
+if __name__ == '__main__':
+    unittest.main()